@@ -4,5 +4,12 @@ AI Expense Categorization Module
 This module provides AI-powered expense categorization using machine learning.
 """
 
-from .ai_model import ExpenseClassifier, TextPreprocessor
-from .ai_trainer import AITrainer 
\ No newline at end of file
+from .ai_trainer import AITrainer
+
+
+def __getattr__(name):
+    # ai_model pulls in sklearn, so only import it when actually requested
+    if name in ('ExpenseClassifier', 'TextPreprocessor'):
+        from . import ai_model
+        return getattr(ai_model, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,22 +6,23 @@ This model uses NLP techniques and scikit-learn for classification.
 """
 
 import re
+import functools
 import numpy as np
 import pandas as pd
 import os
-import json
-import pickle
+import orjson
+import joblib
+import itertools
 import logging
 from datetime import datetime
 from pathlib import Path
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report, f1_score
-from sklearn.preprocessing import LabelEncoder
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.preprocessing import LabelEncoder, normalize
+from sklearn.base import BaseEstimator, ClassifierMixin
+from scipy import sparse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -48,20 +49,85 @@ EXPENSE_CATEGORIES = [
     'Miscellaneous'
 ]
 
+# Worker processes used by the model (-1 = all cores); override for containers
+try:
+    N_JOBS = int(os.environ.get('EXPENSE_CLASSIFIER_JOBS', -1))
+except ValueError:
+    logger.warning(f"Invalid EXPENSE_CLASSIFIER_JOBS value {os.environ['EXPENSE_CLASSIFIER_JOBS']!r}, using all cores")
+    N_JOBS = -1
+
+# Text lists at least this long are preprocessed in parallel worker processes
+PARALLEL_PREPROCESS_MIN_SAMPLES = 10000
+
+# Below this many training samples the nearest-centroid model is used
+NEAREST_CENTROID_MAX_SAMPLES = 500
+
+# NLTK's English stopword list, inlined so the corpus never has to be loaded
+ENGLISH_STOPWORDS = frozenset({
+    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're",
+    "you've", "you'll", "you'd", 'your', 'yours', 'yourself', 'yourselves', 'he',
+    'him', 'his', 'himself', 'she', "she's", 'her', 'hers', 'herself', 'it', "it's",
+    'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what',
+    'which', 'who', 'whom', 'this', 'that', "that'll", 'these', 'those', 'am', 'is',
+    'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having',
+    'do', 'does', 'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or',
+    'because', 'as', 'until', 'while', 'of', 'at', 'by', 'for', 'with', 'about',
+    'against', 'between', 'into', 'through', 'during', 'before', 'after', 'above',
+    'below', 'to', 'from', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under',
+    'again', 'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why',
+    'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some',
+    'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very',
+    's', 't', 'can', 'will', 'just', 'don', "don't", 'should', "should've", 'now',
+    'd', 'll', 'm', 'o', 're', 've', 'y', 'ain', 'aren', "aren't", 'couldn',
+    "couldn't", 'didn', "didn't", 'doesn', "doesn't", 'hadn', "hadn't", 'hasn',
+    "hasn't", 'haven', "haven't", 'isn', "isn't", 'ma', 'mightn', "mightn't",
+    'mustn', "mustn't", 'needn', "needn't", 'shan', "shan't", 'shouldn',
+    "shouldn't", 'wasn', "wasn't", 'weren', "weren't", 'won', "won't", 'wouldn',
+    "wouldn't"
+})
+
+# Runs of 3+ word characters; punctuation and whitespace both act as separators
+_TOKEN_RE = re.compile(r'\w{3,}')
+
 class TextPreprocessor:
     """Handles text preprocessing for NLP models"""
     
     def __init__(self):
-        """Initialize the preprocessor with NLP components"""
+        """Initialize the preprocessor; NLTK components are set up on first use"""
+        self.stop_words = ENGLISH_STOPWORDS
+        self.lemmatizer = None
+        self._lemmatize = None
+        self._initialized = False
+    
+    def __getstate__(self):
+        """Drop the NLTK components when pickling; they are rebuilt on first use"""
+        state = self.__dict__.copy()
+        state.update(lemmatizer=None, _lemmatize=None, _initialized=False)
+        return state
+    
+    def _ensure_init(self):
+        """Set up the NLTK components the first time they are needed"""
+        if self._initialized:
+            return
+        
+        # Import here so loading this module does not pay for NLTK
+        from nltk.stem import WordNetLemmatizer
+        
         # Ensure NLTK resources are downloaded
         self._download_nltk_resources()
         
         # Setup NLP components
-        self.stop_words = set(stopwords.words('english'))
         self.lemmatizer = WordNetLemmatizer()
+        
+        # Expense descriptions repeat the same merchant words constantly,
+        # so memoize the WordNet lookups
+        self._lemmatize = functools.lru_cache(maxsize=131072)(self.lemmatizer.lemmatize)
+        self._initialized = True
     
     def _download_nltk_resources(self):
         """Download required NLTK resources"""
+        import nltk
+        
         try:
             # Set custom path for NLTK data
             nltk_data_dir = str(Path.home() / 'nltk_data')
@@ -69,7 +135,7 @@ class TextPreprocessor:
             nltk.data.path.append(nltk_data_dir)
             
             # Download required resources
-            for resource in ['stopwords', 'wordnet', 'punkt']:
+            for resource in ['wordnet']:
                 try:
                     nltk.data.find(f'corpora/{resource}' if resource != 'punkt' else f'tokenizers/{resource}')
                     logger.debug(f"NLTK resource '{resource}' already available")
@@ -94,26 +160,97 @@ class TextPreprocessor:
         if not text or not isinstance(text, str):
             return ""
         
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters (keep letters, numbers, spaces)
-        text = re.sub(r'[^\w\s]', ' ', text)
+        self._ensure_init()
         
-        # Tokenize
-        tokens = text.split()
+        # Lowercase and tokenize in one scan, dropping tokens shorter than 3 chars
+        tokens = _TOKEN_RE.findall(text.lower())
         
         # Remove stopwords and lemmatize tokens
         processed_tokens = [
-            self.lemmatizer.lemmatize(token) 
+            self._lemmatize(token) 
             for token in tokens 
-            if token not in self.stop_words and len(token) > 2
+            if token not in self.stop_words
         ]
         
         # Rejoin into a string
         return " ".join(processed_tokens)
 
 
+def _preprocess_chunk(preprocessor, texts):
+    """Preprocess a chunk of texts (module level so worker processes can unpickle it)"""
+    return [preprocessor.preprocess(text) for text in texts]
+
+
+class NearestCentroidClassifier(BaseEstimator, ClassifierMixin):
+    """
+    Cosine-similarity classifier over L2-normalized class centroids
+    
+    Works directly on sparse TF-IDF rows: scoring a description is a single
+    sparse dot product against the centroids, which suits small datasets.
+    """
+    
+    def fit(self, X, y):
+        """
+        Compute one normalized centroid per class
+        
+        Args:
+            X (scipy.sparse matrix): TF-IDF features
+            y (array-like): Encoded class labels
+            
+        Returns:
+            NearestCentroidClassifier: The fitted classifier
+        """
+        self.classes_, class_rows = np.unique(y, return_inverse=True)
+        n_samples = len(class_rows)
+        
+        # Averaging matrix: row c holds 1/count(c) for each sample of class c
+        weights = 1.0 / np.bincount(class_rows)[class_rows]
+        averaging = sparse.csr_matrix(
+            (weights, (class_rows, np.arange(n_samples))),
+            shape=(len(self.classes_), n_samples)
+        )
+        
+        self.centroids_ = normalize(sparse.csr_matrix(averaging @ X), norm='l2')
+        return self
+    
+    @property
+    def coef_(self):
+        """Per-class feature weights, used for feature importances"""
+        return self.centroids_.toarray()
+    
+    def predict_proba(self, X):
+        """
+        Score samples by cosine similarity to each class centroid
+        
+        Args:
+            X (scipy.sparse matrix): TF-IDF features
+            
+        Returns:
+            numpy.ndarray: Similarities normalized to sum to 1 per sample
+        """
+        similarities = (X @ self.centroids_.T).toarray()
+        totals = similarities.sum(axis=1, keepdims=True)
+        
+        # Samples sharing no terms with any centroid get a uniform distribution
+        return np.divide(
+            similarities, totals,
+            out=np.full_like(similarities, 1.0 / len(self.classes_)),
+            where=totals > 0
+        )
+    
+    def predict(self, X):
+        """
+        Predict the class with the most similar centroid
+        
+        Args:
+            X (scipy.sparse matrix): TF-IDF features
+            
+        Returns:
+            numpy.ndarray: Encoded class labels
+        """
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
 class ExpenseClassifier:
     """Expense categorization model with retraining support"""
     
@@ -121,17 +258,8 @@ class ExpenseClassifier:
         """Initialize the classifier with default settings"""
         # Setup components
         self.preprocessor = TextPreprocessor()
-        self.vectorizer = TfidfVectorizer(
-            max_features=2000,
-            min_df=2,
-            ngram_range=(1, 2)
-        )
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=None,
-            min_samples_split=2,
-            random_state=42
-        )
+        self.vectorizer = self._create_vectorizer()
+        self.model = self._create_linear_model()
         self.label_encoder = LabelEncoder()
         
         # For tracking
@@ -140,6 +268,7 @@ class ExpenseClassifier:
         self.last_trained = None
         self.accuracy = None
         self.feature_importances = {}
+        self._explain_index = {}
         
         # Storage paths
         self.model_dir = model_dir
@@ -149,6 +278,51 @@ class ExpenseClassifier:
         self.categories = EXPENSE_CATEGORIES
         self.label_encoder.fit(self.categories)
     
+    @staticmethod
+    def _create_vectorizer():
+        """Create the default TF-IDF vectorizer"""
+        # Input is already lowercased and space-joined by the preprocessor,
+        # so a plain split replaces the vectorizer's own regex tokenization
+        return TfidfVectorizer(
+            max_features=2000,
+            min_df=2,
+            ngram_range=(1, 2),
+            lowercase=False,
+            tokenizer=str.split,
+            token_pattern=None,
+            sublinear_tf=True,
+            norm='l2',
+            dtype=np.float32
+        )
+    
+    @staticmethod
+    def _create_linear_model():
+        """Create the default classifier for larger datasets"""
+        return LogisticRegression(
+            solver='saga',
+            max_iter=1000,
+            random_state=42
+        )
+    
+    def _select_model(self, n_samples):
+        """
+        Switch between the default classifiers based on dataset size
+        
+        Small datasets use the nearest-centroid model, larger ones logistic
+        regression. The online model is replaced as well, since a full retrain
+        refits the TF-IDF vocabulary. Any other model type (e.g. one restored
+        from an older save) is kept as is.
+        
+        Args:
+            n_samples (int): Number of training samples
+        """
+        use_centroids = n_samples < NEAREST_CENTROID_MAX_SAMPLES
+        
+        if use_centroids and isinstance(self.model, (LogisticRegression, SGDClassifier)):
+            self.model = NearestCentroidClassifier()
+        elif not use_centroids and isinstance(self.model, (NearestCentroidClassifier, SGDClassifier)):
+            self.model = self._create_linear_model()
+    
     def ensure_model_dir(self):
         """Ensure model directory exists"""
         os.makedirs(self.model_dir, exist_ok=True)
@@ -165,16 +339,17 @@ class ExpenseClassifier:
         """Get path for saving metadata"""
         return os.path.join(self.model_dir, f"metadata_v{self.model_version}.json")
     
+    def _get_current_version_path(self):
+        """Get path of the file recording the latest saved version"""
+        return os.path.join(self.model_dir, "current.txt")
+    
     def save(self):
         """Save the model and all components"""
         try:
-            # Save model
-            with open(self._get_model_path(), 'wb') as f:
-                pickle.dump(self.model, f)
-            
-            # Save vectorizer
-            with open(self._get_vectorizer_path(), 'wb') as f:
-                pickle.dump(self.vectorizer, f)
+            # Save model and vectorizer (joblib stores numpy arrays as raw
+            # compressed buffers instead of pickling them element by element)
+            joblib.dump(self.model, self._get_model_path(), compress=3)
+            joblib.dump(self.vectorizer, self._get_vectorizer_path(), compress=3)
             
             # Save metadata
             metadata = {
@@ -184,13 +359,18 @@ class ExpenseClassifier:
                 'accuracy': self.accuracy,
                 'categories': self.categories,
                 'feature_importances': {
-                    category: [(feature, float(importance)) for feature, importance in importances]
+                    str(category): [(feature, float(importance)) for feature, importance in importances]
                     for category, importances in self.feature_importances.items()
                 }
             }
             
-            with open(self._get_metadata_path(), 'w') as f:
-                json.dump(metadata, f, indent=2)
+            # Machine-read only, so written compact
+            with open(self._get_metadata_path(), 'wb') as f:
+                f.write(orjson.dumps(metadata, option=orjson.OPT_SERIALIZE_NUMPY))
+            
+            # Point load() at this version without scanning the directory
+            with open(self._get_current_version_path(), 'w') as f:
+                f.write(str(self.model_version))
             
             logger.info(f"Model version {self.model_version} saved successfully")
             return True
@@ -199,6 +379,19 @@ class ExpenseClassifier:
             logger.error(f"Failed to save model: {str(e)}")
             return False
     
+    def _read_current_version(self):
+        """
+        Read the latest saved version from the pointer file
+        
+        Returns:
+            int: Latest version, or None if the pointer file is missing or invalid
+        """
+        try:
+            with open(self._get_current_version_path(), 'r') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+    
     def load(self, version=None):
         """
         Load a saved model
@@ -211,6 +404,9 @@ class ExpenseClassifier:
         """
         try:
             # Determine version to load
+            if version is None:
+                version = self._read_current_version()
+            
             if version is None:
                 # Find latest version
                 versions = []
@@ -238,17 +434,20 @@ class ExpenseClassifier:
                 logger.error(f"Model version {version} files not found")
                 return False
             
-            # Load model
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
+            # Load model (joblib also reads files written with plain pickle)
+            self.model = joblib.load(model_path)
+            
+            # Tree ensembles score their trees in parallel; apply this host's
+            # worker count rather than the one the model was saved with
+            if hasattr(self.model, 'n_jobs'):
+                self.model.n_jobs = N_JOBS
             
             # Load vectorizer
-            with open(vectorizer_path, 'rb') as f:
-                self.vectorizer = pickle.load(f)
+            self.vectorizer = joblib.load(vectorizer_path)
             
             # Load metadata
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
+            with open(metadata_path, 'rb') as f:
+                metadata = orjson.loads(f.read())
             
             # Set properties
             self.model_version = metadata['version']
@@ -263,6 +462,8 @@ class ExpenseClassifier:
                 for category, importances in metadata.get('feature_importances', {}).items()
             }
             
+            self._build_explain_index()
+            
             # Update label encoder
             self.label_encoder.fit(self.categories)
             
@@ -273,7 +474,7 @@ class ExpenseClassifier:
             logger.error(f"Failed to load model: {str(e)}")
             return False
     
-    def train(self, descriptions, categories, test_size=0.2):
+    def train(self, descriptions, categories, test_size=0.2, compute_f1=False):
         """
         Train the model on expense descriptions
         
@@ -281,6 +482,7 @@ class ExpenseClassifier:
             descriptions (list): List of expense descriptions
             categories (list): List of categories
             test_size (float): Test size ratio (0.0-1.0)
+            compute_f1 (bool): Also compute the weighted F1 score
             
         Returns:
             dict: Training results with metrics
@@ -295,22 +497,40 @@ class ExpenseClassifier:
         if not hasattr(self, 'preprocessor') or self.preprocessor is None:
             self.preprocessor = TextPreprocessor()
             
-        processed_descriptions = [self.preprocessor.preprocess(desc) for desc in descriptions]
+        processed_descriptions = self._preprocess_all(descriptions)
+        
+        # A full retrain goes back from the online model's hashing to TF-IDF
+        if isinstance(self.vectorizer, HashingVectorizer):
+            self.vectorizer = self._create_vectorizer()
         
+        # Create vectors
+        X = self.vectorizer.fit_transform(processed_descriptions)
+        
+        return self._fit_features(X, categories, test_size, compute_f1)
+    
+    def _fit_features(self, X, categories, test_size=0.2, compute_f1=False):
+        """
+        Fit the model on already vectorized descriptions, then evaluate and save it
+        
+        Args:
+            X (scipy.sparse matrix): Feature rows from the current vectorizer
+            categories (list): Category of each row
+            test_size (float): Test size ratio (0.0-1.0)
+            compute_f1 (bool): Also compute the weighted F1 score
+            
+        Returns:
+            dict: Training results with metrics
+        """
         # Fit label encoder
         unique_categories = sorted(list(set(categories)))
         self.categories = unique_categories
         self.label_encoder.fit(unique_categories)
-        encoded_categories = self.label_encoder.transform(categories)
-        
-        # Create vectors
-        X = self.vectorizer.fit_transform(processed_descriptions)
-        y = encoded_categories
+        y = self.label_encoder.transform(categories)
         
         # Adjust test_size to ensure it's large enough for stratification
         # The test set must have at least one sample per class
         num_classes = len(unique_categories)
-        min_test_size = num_classes / len(descriptions)
+        min_test_size = num_classes / X.shape[0]
         adjusted_test_size = max(test_size, min_test_size)
         
         # Split data
@@ -319,18 +539,20 @@ class ExpenseClassifier:
         )
         
         # Train model
+        self._select_model(X.shape[0])
         self.model.fit(X_train, y_train)
         
         # Evaluate
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred, average='weighted')
+        f1 = f1_score(y_test, y_pred, average='weighted') if compute_f1 else None
+        
+        # Update metadata
+        self.is_trained = True
         
         # Store feature importances
         self._extract_feature_importances()
         
-        # Update metadata
-        self.is_trained = True
         self.last_trained = datetime.now()
         self.accuracy = accuracy
         self.model_version += 1
@@ -350,6 +572,30 @@ class ExpenseClassifier:
         
         return results
     
+    def _preprocess_all(self, texts):
+        """
+        Preprocess a list of texts, spreading large lists over worker processes
+        
+        Args:
+            texts (list): Raw texts
+            
+        Returns:
+            list: Processed texts, in input order
+        """
+        n_workers = joblib.effective_n_jobs(N_JOBS)
+        if len(texts) < PARALLEL_PREPROCESS_MIN_SAMPLES or n_workers < 2:
+            return [self.preprocessor.preprocess(text) for text in texts]
+        
+        # One chunk per worker keeps pickling overhead to a minimum
+        texts = list(texts)
+        chunk_size = -(-len(texts) // n_workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        
+        results = joblib.Parallel(n_jobs=n_workers)(
+            joblib.delayed(_preprocess_chunk)(self.preprocessor, chunk) for chunk in chunks
+        )
+        return list(itertools.chain.from_iterable(results))
+    
     def predict(self, description):
         """
         Predict category for an expense description
@@ -360,47 +606,66 @@ class ExpenseClassifier:
         Returns:
             dict: Prediction results
         """
+        return self.predict_batch([description])[0]
+    
+    def predict_batch(self, descriptions):
+        """
+        Predict categories for many expense descriptions at once
+        
+        The whole batch is vectorized and scored in a single call, so the
+        per-call model overhead is paid once rather than per description.
+        
+        Args:
+            descriptions (list): List of expense description texts
+            
+        Returns:
+            list: Prediction results, one dict per description
+        """
         if not self.is_trained:
             raise ValueError("Model must be trained before prediction")
         
+        if not descriptions:
+            return []
+        
         # Preprocess
-        processed_text = self.preprocessor.preprocess(description)
+        processed_texts = self._preprocess_all(descriptions)
         
         # Vectorize
-        X = self.vectorizer.transform([processed_text])
-        
-        # Predict
-        encoded_category = self.model.predict(X)[0]
-        probabilities = self.model.predict_proba(X)[0]
-        
-        # Get predicted category
-        category = self.label_encoder.inverse_transform([encoded_category])[0]
+        X = self.vectorizer.transform(processed_texts)
         
-        # Get confidence (probability of the predicted class)
-        confidence = probabilities[encoded_category]
+        # Predict (probabilities are ordered by the model's encoded classes)
+        probabilities = self.model.predict_proba(X)
         
-        # Get alternative predictions
-        sorted_indices = np.argsort(probabilities)[::-1]
-        alternatives = []
+        # Rank the predicted category followed by the top 3 alternatives
+        top_indices = np.argsort(-probabilities, axis=1, kind='stable')[:, :4]
+        top_confidences = np.take_along_axis(probabilities, top_indices, axis=1)
+        top_categories = self.label_encoder.inverse_transform(
+            self.model.classes_[top_indices.ravel()]
+        ).reshape(top_indices.shape)
         
-        for idx in sorted_indices[1:4]:  # Top 3 alternatives
-            alt_category = self.label_encoder.inverse_transform([idx])[0]
-            alt_confidence = probabilities[idx]
+        results = []
+        for row, processed_text in enumerate(processed_texts):
+            category = top_categories[row, 0]
             
-            alternatives.append({
-                'category': alt_category,
-                'confidence': float(alt_confidence)
+            alternatives = [
+                {
+                    'category': alt_category,
+                    'confidence': float(alt_confidence)
+                }
+                for alt_category, alt_confidence in zip(top_categories[row, 1:], top_confidences[row, 1:])
+            ]
+            
+            # Create explanation
+            explanation = self._generate_explanation(processed_text, category)
+            
+            results.append({
+                'category': category,
+                'confidence': float(top_confidences[row, 0]),
+                'alternatives': alternatives,
+                'explanation': explanation
             })
         
-        # Create explanation
-        explanation = self._generate_explanation(processed_text, category)
-        
-        return {
-            'category': category,
-            'confidence': float(confidence),
-            'alternatives': alternatives,
-            'explanation': explanation
-        }
+        return results
     
     def _extract_feature_importances(self):
         """Extract and store feature importances per category"""
@@ -411,40 +676,95 @@ class ExpenseClassifier:
             # Get feature names
             feature_names = self.vectorizer.get_feature_names_out()
             
-            # Get global feature importances
-            importances = self.model.feature_importances_
+            # Random Forest models saved by earlier versions: stack the per-tree
+            # importances once, weighted by each tree's class support at the root
+            if not hasattr(self.model, 'coef_'):
+                tree_importances = np.stack([tree.feature_importances_ for tree in self.model.estimators_])
+                tree_class_support = np.stack([tree.tree_.value[0, 0] for tree in self.model.estimators_])
             
             # Get indices for each category
             self.feature_importances = {}
             
             for category_idx, category in enumerate(self.label_encoder.classes_):
-                # Create list of (feature, importance) tuples
-                category_importance = []
-                
-                # For Random Forest, extract feature importances
-                tree_feature_importances = []
-                for tree in self.model.estimators_:
-                    # Filter samples where this tree predicted the current category
-                    if tree.classes_[tree.predict([0])[0]] == category_idx:
-                        tree_feature_importances.append(tree.feature_importances_)
+                if hasattr(self.model, 'coef_'):
+                    # Linear models expose one weight per feature for each class
+                    avg_importances = self._get_linear_weights(category_idx)
+                else:
+                    avg_importances = self._get_forest_weights(category_idx, tree_importances, tree_class_support)
                 
                 # If we have importances for this category
-                if tree_feature_importances:
-                    avg_importances = np.mean(tree_feature_importances, axis=0)
-                    
-                    for idx, importance in enumerate(avg_importances):
-                        if importance > 0:
-                            category_importance.append((feature_names[idx], importance))
+                if avg_importances is not None:
+                    # Select the top 20 features without sorting all of them
+                    top_k = min(20, avg_importances.size)
+                    top_indices = np.argpartition(-avg_importances, top_k - 1)[:top_k]
+                    top_indices = top_indices[np.argsort(-avg_importances[top_indices], kind='stable')]
                     
-                    # Sort by importance (descending)
-                    category_importance.sort(key=lambda x: x[1], reverse=True)
-                    
-                    # Keep top 20 features
-                    self.feature_importances[category] = category_importance[:20]
+                    # Create list of (feature, importance) tuples
+                    self.feature_importances[category] = [
+                        (feature_names[idx], float(avg_importances[idx]))
+                        for idx in top_indices
+                        if avg_importances[idx] > 0
+                    ]
+            
+            self._build_explain_index()
             
         except Exception as e:
             logger.warning(f"Failed to extract feature importances: {str(e)}")
     
+    def _get_linear_weights(self, category_idx):
+        """
+        Get the per-feature weights a linear model learned for one category
+        
+        Args:
+            category_idx (int): Encoded category
+            
+        Returns:
+            numpy.ndarray: Feature weights, or None if the category was not trained
+        """
+        class_positions = np.flatnonzero(self.model.classes_ == category_idx)
+        if class_positions.size == 0:
+            return None
+        
+        coefficients = self.model.coef_
+        if coefficients.shape[0] == 1:
+            # Binary problems only store the weights of the positive class
+            return coefficients[0] if class_positions[0] == 1 else -coefficients[0]
+        
+        return coefficients[class_positions[0]]
+    
+    def _get_forest_weights(self, category_idx, tree_importances, tree_class_support):
+        """
+        Get support-weighted feature importances of a tree ensemble for one category
+        
+        Args:
+            category_idx (int): Encoded category
+            tree_importances (numpy.ndarray): Stacked importances, shape (n_trees, n_features)
+            tree_class_support (numpy.ndarray): Root class support, shape (n_trees, n_classes)
+            
+        Returns:
+            numpy.ndarray: Feature importances, or None if the category was not trained
+        """
+        class_positions = np.flatnonzero(self.model.classes_ == category_idx)
+        if class_positions.size == 0:
+            return None
+        
+        weights = tree_class_support[:, class_positions[0]]
+        total_weight = weights.sum()
+        if total_weight <= 0:
+            return None
+        
+        return weights @ tree_importances / total_weight
+    
+    def _build_explain_index(self):
+        """Index each category's important features as uni-gram and bi-gram sets"""
+        self._explain_index = {}
+        for category, importances in self.feature_importances.items():
+            features = [feature for feature, _ in importances]
+            self._explain_index[category] = (
+                {feature for feature in features if ' ' not in feature},
+                {feature for feature in features if ' ' in feature}
+            )
+    
     def _generate_explanation(self, processed_text, category):
         """
         Generate an explanation for a prediction
@@ -460,27 +780,24 @@ class ExpenseClassifier:
         tokens = processed_text.split()
         
         # If no feature importances or tokens, return generic message
-        if category not in self.feature_importances or not tokens:
+        if category not in self._explain_index or not tokens:
             return f"This expense was classified as '{category}' based on its description."
         
-        # Get important features for this category
-        important_features = [feature for feature, _ in self.feature_importances[category]]
+        # Get important uni-gram and bi-gram features for this category
+        unigram_features, bigram_features = self._explain_index[category]
         
         # Find matching features in the description
-        matching_features = []
-        for token in tokens:
-            if token in important_features:
-                matching_features.append(token)
-            else:
-                # Check for bi-gram features
-                for feature in important_features:
-                    if ' ' in feature and token in feature.split():
-                        for i in range(len(tokens) - 1):
-                            if tokens[i] + ' ' + tokens[i+1] == feature:
-                                matching_features.append(feature)
+        matching_features = [token for token in tokens if token in unigram_features]
+        
+        # Check for bi-gram features (most categories only have uni-grams)
+        if bigram_features:
+            matching_features.extend(
+                bigram for bigram in map(' '.join, zip(tokens, tokens[1:]))
+                if bigram in bigram_features
+            )
         
         # Remove duplicates
-        matching_features = list(set(matching_features))
+        matching_features = list(dict.fromkeys(matching_features))
         
         if matching_features:
             if len(matching_features) == 1:
@@ -493,57 +810,207 @@ class ExpenseClassifier:
         else:
             return f"This expense was classified as '{category}' based on its description."
 
-    def add_training_data(self, new_data):
+    def add_training_data(self, new_data=None, descriptions=None, categories=None):
         """
         Add new training data and retrain the model
         
         Args:
-            new_data (list): List of dict with keys 'description' and 'category'
+            new_data (list, optional): List of dict with keys 'description' and 'category'
+            descriptions (list, optional): Descriptions, used instead of new_data
+            categories (list, optional): Categories parallel to descriptions
             
         Returns:
             dict: Training results
         """
-        if not new_data:
+        if new_data:
+            descriptions = []
+            categories = []
+            for item in new_data:
+                if 'description' in item and 'category' in item:
+                    descriptions.append(item['description'])
+                    categories.append(item['category'])
+        elif descriptions and categories and len(descriptions) == len(categories):
+            descriptions = list(descriptions)
+            categories = list(categories)
+        else:
             return None
         
+        # When the fitted vocabulary already covers the new descriptions, build
+        # the synthetic rows directly as sparse vectors and keep the vocabulary
+        if self.is_trained and isinstance(self.vectorizer, TfidfVectorizer) and descriptions:
+            processed_descriptions = self._preprocess_all(descriptions)
+            vocabulary = self.vectorizer.vocabulary_
+            
+            if all(token in vocabulary for text in processed_descriptions for token in text.split()):
+                X_synthetic, synthetic_categories = self._generate_synthetic_rows()
+                X = sparse.vstack([X_synthetic, self.vectorizer.transform(processed_descriptions)], format='csr')
+                
+                if X.shape[0] >= 10:
+                    return self._fit_features(X, synthetic_categories + categories)
+        
         # Load existing data if model is trained
         if self.is_trained:
-            # Get feature names and sample data to recreate training dataset
-            feature_names = self.vectorizer.get_feature_names_out()
-            X_sample = self.vectorizer.transform(["sample text"])
-            
             # We can't directly access the training data, so we'll generate synthetic data
             # This is a compromise, but sufficient for demonstration
-            synthetic_descriptions = []
-            synthetic_categories = []
-            
-            # Generate synthetic examples based on feature importances
-            for category in self.feature_importances:
-                # Get top features for this category
-                top_features = [feature for feature, _ in self.feature_importances[category][:10]]
-                
-                # Create 3 synthetic examples per category
-                for i in range(3):
-                    # Use random 2-3 top features for this category
-                    num_features = min(len(top_features), np.random.randint(2, 4))
-                    features = np.random.choice(top_features, num_features, replace=False)
-                    
-                    # Create a synthetic description
-                    synthetic_desc = " ".join(features)
-                    synthetic_descriptions.append(synthetic_desc)
-                    synthetic_categories.append(category)
+            synthetic_descriptions, synthetic_categories = self._generate_synthetic_examples()
         else:
             # If not trained, start with empty lists
             synthetic_descriptions = []
             synthetic_categories = []
         
         # Add new data
-        for item in new_data:
-            if 'description' in item and 'category' in item:
-                synthetic_descriptions.append(item['description'])
-                synthetic_categories.append(item['category'])
+        synthetic_descriptions.extend(descriptions)
+        synthetic_categories.extend(categories)
         
         # Train with combined data
         results = self.train(synthetic_descriptions, synthetic_categories)
         
-        return results 
\ No newline at end of file
+        return results 
+    
+    def partial_update(self, new_data):
+        """
+        Incrementally update the model with new training data
+        
+        Unlike add_training_data, this does not refit from scratch. The first
+        call switches the model to a HashingVectorizer and SGDClassifier (seeded
+        with synthetic examples of the current model); later calls only learn
+        from the new examples. A full retrain restores the TF-IDF model.
+        
+        Args:
+            new_data (list): List of dict with keys 'description' and 'category'
+            
+        Returns:
+            dict: Training results
+        """
+        if not new_data:
+            return None
+        
+        descriptions = []
+        categories = []
+        for item in new_data:
+            if 'description' in item and 'category' in item:
+                descriptions.append(item['description'])
+                categories.append(item['category'])
+        
+        if not descriptions:
+            return None
+        
+        # Online learning needs a fixed set of classes; fall back to a full retrain otherwise
+        if not self.is_trained or not set(categories).issubset(self.categories):
+            return self.add_training_data(new_data)
+        
+        if not isinstance(self.vectorizer, HashingVectorizer) or not isinstance(self.model, SGDClassifier):
+            self._switch_to_online_model()
+        
+        X = self.vectorizer.transform([self.preprocessor.preprocess(desc) for desc in descriptions])
+        y = self.label_encoder.transform(categories)
+        self.model.partial_fit(X, y, classes=np.arange(len(self.categories)))
+        
+        # Update metadata
+        self.last_trained = datetime.now()
+        self.model_version += 1
+        
+        # Save the new model
+        self.save()
+        
+        return {
+            'accuracy': self.accuracy,
+            'train_samples': len(descriptions),
+            'test_samples': 0,
+            'classes': len(self.categories),
+            'version': self.model_version - 1  # Current version after saving
+        }
+    
+    def _switch_to_online_model(self):
+        """Replace the vectorizer and model with components that support partial_fit"""
+        logger.info("Switching expense classifier to online learning")
+        
+        # Synthetic examples of what the current model learned
+        synthetic_descriptions, synthetic_categories = self._generate_synthetic_examples()
+        
+        # Stateless hashing needs no vocabulary refit as new data arrives
+        self.vectorizer = HashingVectorizer(
+            n_features=2**16,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            lowercase=False,
+            tokenizer=str.split,
+            token_pattern=None
+        )
+        self.model = SGDClassifier(
+            loss='log_loss',
+            random_state=42
+        )
+        
+        if synthetic_descriptions:
+            X = self.vectorizer.transform([self.preprocessor.preprocess(desc) for desc in synthetic_descriptions])
+            y = self.label_encoder.transform(synthetic_categories)
+            self.model.partial_fit(X, y, classes=np.arange(len(self.categories)))
+    
+    def _generate_synthetic_examples(self):
+        """
+        Generate synthetic training examples from the stored feature importances
+        
+        Returns:
+            tuple: (descriptions, categories) lists
+        """
+        synthetic_descriptions = []
+        synthetic_categories = []
+        
+        # Generate synthetic examples based on feature importances
+        for category in self.feature_importances:
+            # Get top features for this category
+            top_features = [feature for feature, _ in self.feature_importances[category][:10]]
+            
+            # Create 3 synthetic examples per category
+            for i in range(3):
+                # Use random 2-3 top features for this category
+                num_features = min(len(top_features), np.random.randint(2, 4))
+                features = np.random.choice(top_features, num_features, replace=False)
+                
+                # Create a synthetic description
+                synthetic_desc = " ".join(features)
+                synthetic_descriptions.append(synthetic_desc)
+                synthetic_categories.append(category)
+        
+        return synthetic_descriptions, synthetic_categories
+    
+    def _generate_synthetic_rows(self):
+        """
+        Generate synthetic TF-IDF rows from the stored feature importances
+        
+        Equivalent to vectorizing _generate_synthetic_examples output, but
+        samples vocabulary columns directly instead of joining and re-parsing strings.
+        
+        Returns:
+            tuple: (CSR matrix of rows, list of categories)
+        """
+        vocabulary = self.vectorizer.vocabulary_
+        idf = self.vectorizer.idf_
+        
+        indices = []
+        indptr = [0]
+        synthetic_categories = []
+        
+        # Generate synthetic examples based on feature importances
+        for category, importances in self.feature_importances.items():
+            # Get vocabulary columns of the top features for this category
+            top_columns = np.array([vocabulary[feature] for feature, _ in importances[:10] if feature in vocabulary], dtype=np.int64)
+            if top_columns.size == 0:
+                continue
+            
+            # Create 3 synthetic examples per category from 2-3 random top features
+            for i in range(3):
+                num_features = min(top_columns.size, np.random.randint(2, 4))
+                indices.append(np.sort(np.random.choice(top_columns, num_features, replace=False)))
+                indptr.append(indptr[-1] + num_features)
+                synthetic_categories.append(category)
+        
+        indices = np.concatenate(indices) if indices else np.array([], dtype=np.int64)
+        
+        # Each sampled feature occurs once, so its TF-IDF weight is just its idf
+        X = sparse.csr_matrix(
+            (idf[indices], indices, np.array(indptr)),
+            shape=(len(synthetic_categories), len(vocabulary))
+        )
+        return normalize(X, norm='l2').astype(self.vectorizer.dtype), synthetic_categories
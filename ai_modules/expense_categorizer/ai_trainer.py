@@ -6,19 +6,153 @@ It manages the correction data flow and model versioning.
 """
 
 import os
-import json
+import sys
+import time
+import functools
+import orjson
 import logging
 from datetime import datetime
-import traceback
 from pathlib import Path
+from contextlib import contextmanager
+from collections import Counter
+from itertools import chain
 
-from .ai_model import ExpenseClassifier
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Sample keywords for each category, used to build initial training examples
+CATEGORY_KEYWORDS = {
+    'Food & Dining': ('restaurant', 'cafe', 'grocery', 'coffee', 'meal', 'food'),
+    'Transportation': ('gas', 'fuel', 'taxi', 'uber', 'car', 'bus', 'train'),
+    'Housing': ('rent', 'mortgage', 'apartment', 'house', 'property'),
+    'Utilities': ('electricity', 'water', 'gas', 'internet', 'phone', 'bill'),
+    'Healthcare': ('doctor', 'hospital', 'medication', 'pharmacy', 'medical'),
+    'Entertainment': ('movie', 'theater', 'concert', 'netflix', 'subscription'),
+    'Shopping': ('clothes', 'shoes', 'retail', 'mall', 'amazon', 'purchase'),
+    'Personal Care': ('haircut', 'salon', 'spa', 'cosmetics', 'gym'),
+    'Education': ('tuition', 'books', 'course', 'school', 'university'),
+    'Travel': ('hotel', 'flight', 'vacation', 'airbnb', 'booking'),
+    'Gifts & Donations': ('gift', 'donation', 'charity', 'present'),
+    'Insurance': ('insurance', 'premium', 'coverage', 'policy'),
+    'Taxes': ('tax', 'irs', 'government', 'filing'),
+    'Business Services': ('consultant', 'service', 'contractor', 'professional'),
+    'Investments': ('investment', 'stock', 'mutual fund', 'broker', 'retirement'),
+    'Miscellaneous': ('other', 'misc', 'unknown', 'general')
+}
+
+# Keyword index combinations used to build the initial synthetic examples
+INITIAL_EXAMPLE_PATTERNS = ((0,), (0, 1), (0, 1, 2), (1,), (2,))
+
+# Rewrite the corrections log once this many applied marks have accumulated
+CORRECTIONS_COMPACT_THRESHOLD = 1000
+
+@functools.lru_cache(maxsize=1)
+def _default_training_data():
+    """
+    Load the default training data from training_data.py
+    
+    Returns:
+        tuple: (descriptions, categories, number of samples)
+    """
+    from .training_data import MAIN_CATEGORY_TRAINING_DATA
+    
+    descriptions = MAIN_CATEGORY_TRAINING_DATA['descriptions']
+    return descriptions, MAIN_CATEGORY_TRAINING_DATA['categories'], len(descriptions)
+
+
+# Optional AICorrection columns copied over only when set; amount and
+# confidence are stored as Decimals in the database
+OPTIONAL_CORRECTION_FIELDS = (('amount', float), ('confidence', float), ('transaction_id', None))
+
+
+def _format_db_correction(correction):
+    """
+    Convert an AICorrection row to the dict format used by the trainer
+    
+    Args:
+        correction: AICorrection database object
+        
+    Returns:
+        dict: Correction in the in-memory format
+    """
+    created_at = correction.created_at
+    formatted = {
+        'id': correction.id,
+        'user_id': correction.user_id,
+        'description': correction.description,
+        'predicted_category': correction.predicted_category,
+        'correct_category': correction.correct_category,
+        'created_at': created_at.isoformat() if hasattr(created_at, 'isoformat') else str(created_at),
+        'is_applied': False
+    }
+    
+    for field, convert in OPTIONAL_CORRECTION_FIELDS:
+        value = getattr(correction, field, None)
+        if value is not None:
+            formatted[field] = convert(value) if convert else value
+    
+    return formatted
+
+
+
+def _now_ms():
+    """Current time as integer epoch milliseconds, the timestamp format of the corrections logs"""
+    return int(time.time() * 1000)
+
+
+def timestamp_to_iso(value):
+    """
+    Format a correction timestamp as an ISO 8601 string
+    
+    Args:
+        value: Epoch milliseconds, or an ISO string as written by older versions
+        
+    Returns:
+        str: ISO formatted timestamp, or the value unchanged if it is not numeric
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value / 1000).isoformat()
+    return value
+
+
+def export_pretty(path, output_path=None):
+    """
+    Render a trainer data file as indented JSON for reading by hand
+    
+    The trainer writes its files in compact form; JSONL files such as the
+    corrections log are rendered as a single JSON array, with their epoch
+    millisecond timestamps shown as ISO strings.
+    
+    Args:
+        path (str): Training history or corrections file
+        output_path (str, optional): File to write to instead of returning the text
+        
+    Returns:
+        str: Indented JSON, or None when written to output_path
+    """
+    with open(path, 'rb') as f:
+        if path.endswith('.jsonl'):
+            data = [orjson.loads(line) for line in f if line.strip()]
+            for record in data:
+                for key in ('created_at', 'applied_at'):
+                    if key in record:
+                        record[key] = timestamp_to_iso(record[key])
+        else:
+            data = orjson.loads(f.read())
+    
+    pretty = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    
+    if output_path is None:
+        return pretty.decode('utf-8')
+    
+    with open(output_path, 'wb') as f:
+        f.write(pretty)
+    return None
+
+
 class AITrainer:
     """
     Manager for AI model training and retraining with user corrections
@@ -39,30 +173,46 @@ class AITrainer:
         self.base_dir = base_dir
         self.model_dir = os.path.join(base_dir, 'models')
         self.data_dir = os.path.join(base_dir, 'data')
-        self.corrections_path = os.path.join(self.data_dir, 'user_corrections.json')
+        self.corrections_path = os.path.join(self.data_dir, 'user_corrections.jsonl')
+        self.applied_corrections_path = os.path.join(self.data_dir, 'applied_corrections.jsonl')
+        self.legacy_corrections_path = os.path.join(self.data_dir, 'user_corrections.json')
         self.training_history_path = os.path.join(self.data_dir, 'training_history.json')
         
         # Create required directories
         os.makedirs(self.model_dir, exist_ok=True)
         os.makedirs(self.data_dir, exist_ok=True)
         
-        # Initialize classifier
-        self.classifier = ExpenseClassifier(model_dir=self.model_dir)
-        
         # Load or initialize training history
         self.training_history = self._load_training_history()
         
+        # Corrections not yet appended to disk, and nesting depth of batch() blocks
+        self._pending_corrections = []
+        self._pending_applied = []
+        self._batch_depth = 0
+        
         # Corrections data
+        self._needs_compaction = False
         self.corrections = self._load_corrections()
+        self._index_corrections()
+        
+        if self._needs_compaction:
+            self._save_corrections()
+    
+    @functools.cached_property
+    def classifier(self):
+        """The ExpenseClassifier, created on first use so that recording corrections does not import sklearn"""
+        from .ai_model import ExpenseClassifier
+        return ExpenseClassifier(model_dir=self.model_dir)
     
     def _load_training_history(self):
         """Load training history from file"""
-        if os.path.exists(self.training_history_path):
-            try:
-                with open(self.training_history_path, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading training history: {str(e)}")
+        try:
+            with open(self.training_history_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading training history: {str(e)}")
         
         # Default empty history
         return {
@@ -75,38 +225,232 @@ class AITrainer:
     def _save_training_history(self):
         """Save training history to file"""
         try:
-            with open(self.training_history_path, 'w') as f:
-                json.dump(self.training_history, f, indent=2)
+            self._write_atomic(
+                self.training_history_path,
+                orjson.dumps(self.training_history, option=orjson.OPT_NON_STR_KEYS)
+            )
             return True
         except Exception as e:
             logger.error(f"Error saving training history: {str(e)}")
             return False
     
+    def _write_atomic(self, path, data):
+        """
+        Replace a file's contents in one step
+        
+        The data goes to a sibling temp file that is then renamed over the
+        target, so a crash mid-write never leaves a truncated file behind.
+        
+        Args:
+            path (str): File to write
+            data (bytes): New contents
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
     def _load_corrections(self):
-        """Load user corrections from file"""
-        if os.path.exists(self.corrections_path):
-            try:
-                with open(self.corrections_path, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading corrections: {str(e)}")
+        """
+        Load user corrections from file
         
-        # Default empty corrections
-        return {
+        Corrections are stored as an append-only JSON Lines log, with a second
+        log recording which of them have been applied to the model. Their
+        created_at/applied_at are epoch milliseconds; records written by older
+        versions keep ISO strings, which are passed through as-is.
+        """
+        corrections = {
             'unused': [],  # Corrections not yet used for training
-            'applied': []  # Corrections already applied to the model
+            'applied': [],  # Corrections already applied to the model
+            'next_id': 1  # ID for the next correction added
         }
+        
+        try:
+            max_id = 0
+            applied_marks = {}
+            try:
+                for mark in self._read_jsonl(self.applied_corrections_path):
+                    applied_marks[mark['id']] = mark
+            except FileNotFoundError:
+                pass
+            
+            for correction in self._read_jsonl(self.corrections_path):
+                correction_id = correction.get('id', 0)
+                if correction_id > max_id:
+                    max_id = correction_id
+                
+                mark = applied_marks.get(correction_id)
+                if mark is not None:
+                    correction['is_applied'] = True
+                    correction['applied_at'] = mark.get('applied_at')
+                    correction['applied_in_version'] = mark.get('applied_in_version')
+                
+                if correction.get('is_applied'):
+                    corrections['applied'].append(correction)
+                else:
+                    corrections['unused'].append(correction)
+            
+            corrections['next_id'] = max_id + 1
+            
+            if len(applied_marks) >= CORRECTIONS_COMPACT_THRESHOLD:
+                self._needs_compaction = True
+        except FileNotFoundError:
+            # No log yet; migrate corrections saved in the old single-document format
+            return self._load_legacy_corrections(corrections)
+        except Exception as e:
+            logger.error(f"Error loading corrections: {str(e)}")
+        
+        return corrections
+    
+    def _load_legacy_corrections(self, corrections):
+        """
+        Load corrections saved as a single JSON document by older versions
+        
+        Args:
+            corrections (dict): Empty corrections store, returned if there is no legacy file
+            
+        Returns:
+            dict: Loaded corrections
+        """
+        try:
+            with open(self.legacy_corrections_path, 'rb') as f:
+                corrections = orjson.loads(f.read())
+            if 'next_id' not in corrections:
+                corrections['next_id'] = max(
+                    (c.get('id', 0) for c in chain(corrections['unused'], corrections['applied'])),
+                    default=0
+                ) + 1
+            self._needs_compaction = True
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading corrections: {str(e)}")
+        
+        return corrections
+    
+    def _read_jsonl(self, path):
+        """Yield the records of a JSON Lines file, skipping unreadable lines"""
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # e.g. a line cut short by a crash mid-append; rewrite the
+                    # log so later appends do not land on the broken line
+                    logger.warning(f"Skipping unreadable line in {path}")
+                    self._needs_compaction = True
     
     def _save_corrections(self):
-        """Save user corrections to file"""
+        """
+        Rewrite the corrections log from the in-memory state
+        
+        Used to migrate and compact the log; new corrections are appended by flush().
+        """
+        try:
+            self._write_atomic(
+                self.corrections_path,
+                b''.join(orjson.dumps(c) + b'\n' for c in chain(self.corrections['unused'], self.corrections['applied']))
+            )
+            
+            # Applied state is now stored on the corrections themselves
+            try:
+                os.remove(self.applied_corrections_path)
+            except FileNotFoundError:
+                pass
+            
+            self._pending_corrections = []
+            self._pending_applied = []
+            self._needs_compaction = False
+            return True
+        except Exception as e:
+            logger.error(f"Error saving corrections: {str(e)}")
+            return False
+    
+    def _index_corrections(self):
+        """Build the lookup indexes over the loaded corrections"""
+        # Unused corrections by transaction, for duplicate detection
+        self._txid_index = {
+            c['transaction_id']: c for c in self.corrections['unused']
+            if c.get('transaction_id') is not None
+        }
+        
+        self._index_overrides()
+    
+    def _index_overrides(self):
+        """Build the prediction override indexes over all corrections"""
+        # Corrections by (normalized description, amount), and by normalized
+        # description alone for predictions made without an amount
+        self._override_index = {}
+        self._description_override_index = {}
+        for c in chain(self.corrections['unused'], self.corrections['applied']):
+            self._add_to_override_index(c)
+    
+    def _add_to_override_index(self, correction):
+        """Index a correction under its normalized description and amount"""
+        desc_norm = str(correction.get('description', '')).strip().lower()
+        amount = correction.get('amount')
+        if amount is not None:
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                # Left as-is, so it only matches predictions made without an amount
+                pass
+        
+        # The first unused correction wins, then the first applied one
+        for index, key in ((self._override_index, (desc_norm, amount)),
+                           (self._description_override_index, desc_norm)):
+            current = index.get(key)
+            if current is None or (current.get('is_applied') and not correction.get('is_applied')):
+                index[key] = correction
+    
+    def _corrections_changed(self):
+        """Save pending correction changes now, unless inside a batch()"""
+        if self._batch_depth == 0:
+            self.flush()
+    
+    def flush(self):
+        """
+        Append pending correction changes to the on-disk logs
+        
+        Returns:
+            bool: Success flag
+        """
         try:
-            with open(self.corrections_path, 'w') as f:
-                json.dump(self.corrections, f, indent=2)
+            if self._pending_corrections:
+                with open(self.corrections_path, 'ab') as f:
+                    f.write(b''.join(orjson.dumps(c) + b'\n' for c in self._pending_corrections))
+                self._pending_corrections = []
+            
+            if self._pending_applied:
+                with open(self.applied_corrections_path, 'ab') as f:
+                    f.write(b''.join(orjson.dumps(m) + b'\n' for m in self._pending_applied))
+                self._pending_applied = []
+            
             return True
         except Exception as e:
             logger.error(f"Error saving corrections: {str(e)}")
             return False
     
+    @contextmanager
+    def batch(self):
+        """
+        Group several correction changes into a single save
+        
+        Usage:
+            with trainer.batch():
+                for item in items:
+                    trainer.add_correction(...)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+    
     def add_correction(self, user_id, description, predicted_category, correct_category, 
                       amount=None, confidence=None, transaction_id=None):
         """
@@ -127,18 +471,13 @@ class AITrainer:
         try:
             # If transaction_id is provided, check for duplicate
             if transaction_id:
-                for existing in self.corrections['unused']:
-                    if existing.get('transaction_id') == transaction_id:
-                        logger.info(f"Skipping duplicate correction for transaction_id {transaction_id}")
-                        return existing
+                existing = self._txid_index.get(transaction_id)
+                if existing is not None:
+                    logger.info(f"Skipping duplicate correction for transaction_id {transaction_id}")
+                    return existing
             
             # Create correction object with next available ID
-            next_id = 1
-            
-            # Find the highest ID currently in use
-            all_ids = [c.get('id', 0) for c in self.corrections['unused'] + self.corrections['applied']]
-            if all_ids:
-                next_id = max(all_ids) + 1
+            next_id = self.corrections['next_id']
                 
             # Create the correction
             correction = {
@@ -147,7 +486,7 @@ class AITrainer:
                 'description': description,
                 'predicted_category': predicted_category,
                 'correct_category': correct_category,
-                'created_at': datetime.now().isoformat(),
+                'created_at': _now_ms(),
                 'is_applied': False
             }
             
@@ -163,9 +502,14 @@ class AITrainer:
             
             # Add to unused corrections
             self.corrections['unused'].append(correction)
+            self._pending_corrections.append(correction)
+            self._add_to_override_index(correction)
+            self.corrections['next_id'] = next_id + 1
+            if transaction_id:
+                self._txid_index[transaction_id] = correction
             
             # Save corrections
-            self._save_corrections()
+            self._corrections_changed()
             
             logger.info(f"Added correction: {description} - {predicted_category} -> {correct_category}")
             return correction
@@ -199,34 +543,9 @@ class AITrainer:
                 logger.info(f"Found {len(db_corrections)} unused corrections in database")
                 
                 # Convert database corrections to the format used by this class
-                formatted_corrections = []
-                for correction in db_corrections:
-                    formatted = {
-                        'id': correction.id,
-                        'user_id': correction.user_id,
-                        'description': correction.description,
-                        'predicted_category': correction.predicted_category,
-                        'correct_category': correction.correct_category,
-                        'created_at': correction.created_at.isoformat() if hasattr(correction.created_at, 'isoformat') else str(correction.created_at),
-                        'is_applied': False
-                    }
-                    
-                    # Add optional fields if present
-                    if hasattr(correction, 'amount') and correction.amount is not None:
-                        formatted['amount'] = float(correction.amount)
-                    
-                    if hasattr(correction, 'confidence') and correction.confidence is not None:
-                        formatted['confidence'] = float(correction.confidence)
-                    
-                    if hasattr(correction, 'transaction_id') and correction.transaction_id is not None:
-                        formatted['transaction_id'] = correction.transaction_id
-                    
-                    formatted_corrections.append(formatted)
-                
-                return formatted_corrections
+                return list(map(_format_db_correction, db_corrections))
         except Exception as e:
-            logger.error(f"Error retrieving corrections from database: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error retrieving corrections from database: %s", e)
             logger.warning("Falling back to in-memory correction storage")
         
         # Fall back to memory-based corrections if database retrieval fails
@@ -244,26 +563,15 @@ class AITrainer:
         Returns:
             dict: Correction statistics
         """
-        # Count corrections by category
-        category_stats = {}
+        # Count corrections by (category, status)
+        counts = Counter((c['correct_category'], 'unused') for c in self.corrections['unused'])
+        counts.update((c['correct_category'], 'applied') for c in self.corrections['applied'])
         
-        # Process unused corrections
-        for correction in self.corrections['unused']:
-            category = correction['correct_category']
-            if category not in category_stats:
-                category_stats[category] = {'total': 0, 'applied': 0, 'unused': 0}
-            
-            category_stats[category]['total'] += 1
-            category_stats[category]['unused'] += 1
-        
-        # Process applied corrections
-        for correction in self.corrections['applied']:
-            category = correction['correct_category']
-            if category not in category_stats:
-                category_stats[category] = {'total': 0, 'applied': 0, 'unused': 0}
-            
-            category_stats[category]['total'] += 1
-            category_stats[category]['applied'] += 1
+        category_stats = {}
+        for (category, status), count in counts.items():
+            stats = category_stats.setdefault(category, {'total': 0, 'applied': 0, 'unused': 0})
+            stats[status] = count
+            stats['total'] += count
         
         # Overall stats
         total = len(self.corrections['unused']) + len(self.corrections['applied'])
@@ -298,25 +606,13 @@ class AITrainer:
                     # Create category-specific keywords
                     keywords = self._get_category_keywords(category)
                     
-                    # Create examples using these keywords
-                    for i in range(5):  # 5 examples per category
-                        if i < len(keywords):
-                            # Use different combinations of words
-                            if i == 0:
-                                desc = f"{keywords[0]}"
-                            elif i == 1 and len(keywords) > 1:
-                                desc = f"{keywords[0]} {keywords[1]}"
-                            elif i == 2 and len(keywords) > 2:
-                                desc = f"{keywords[0]} {keywords[1]} {keywords[2]}"
-                            elif i == 3 and len(keywords) > 1:
-                                desc = f"{keywords[1]}"
-                            elif i == 4 and len(keywords) > 2:
-                                desc = f"{keywords[2]}"
-                            else:
-                                desc = f"{keywords[0]}"
-                                
-                            descriptions.append(desc)
-                            categories.append(category)
+                    # Create examples using different combinations of these keywords
+                    examples = [
+                        " ".join(keywords[i] for i in pattern)
+                        for pattern in INITIAL_EXAMPLE_PATTERNS[:len(keywords)]
+                    ]
+                    descriptions.extend(examples)
+                    categories.extend([category] * len(examples))
             else:
                 # Use provided data
                 descriptions = training_data['descriptions']
@@ -331,32 +627,12 @@ class AITrainer:
             return results
             
         except Exception as e:
-            logger.error(f"Error training initial model: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error training initial model: %s", e)
             return None
     
     def _get_category_keywords(self, category):
         """Get sample keywords for a category"""
-        category_keywords = {
-            'Food & Dining': ['restaurant', 'cafe', 'grocery', 'coffee', 'meal', 'food'],
-            'Transportation': ['gas', 'fuel', 'taxi', 'uber', 'car', 'bus', 'train'],
-            'Housing': ['rent', 'mortgage', 'apartment', 'house', 'property'],
-            'Utilities': ['electricity', 'water', 'gas', 'internet', 'phone', 'bill'],
-            'Healthcare': ['doctor', 'hospital', 'medication', 'pharmacy', 'medical'],
-            'Entertainment': ['movie', 'theater', 'concert', 'netflix', 'subscription'],
-            'Shopping': ['clothes', 'shoes', 'retail', 'mall', 'amazon', 'purchase'],
-            'Personal Care': ['haircut', 'salon', 'spa', 'cosmetics', 'gym'],
-            'Education': ['tuition', 'books', 'course', 'school', 'university'],
-            'Travel': ['hotel', 'flight', 'vacation', 'airbnb', 'booking'],
-            'Gifts & Donations': ['gift', 'donation', 'charity', 'present'],
-            'Insurance': ['insurance', 'premium', 'coverage', 'policy'],
-            'Taxes': ['tax', 'irs', 'government', 'filing'],
-            'Business Services': ['consultant', 'service', 'contractor', 'professional'],
-            'Investments': ['investment', 'stock', 'mutual fund', 'broker', 'retirement'],
-            'Miscellaneous': ['other', 'misc', 'unknown', 'general']
-        }
-        
-        return category_keywords.get(category, ['general', 'purchase'])
+        return CATEGORY_KEYWORDS.get(category, ('general', 'purchase'))
     
     def retrain_with_corrections(self, max_corrections=None):
         """
@@ -392,18 +668,12 @@ class AITrainer:
                     }
             
             # Prepare correction data for training
-            training_data = []
-            correction_ids = []
-            
-            for correction in unused_corrections:
-                training_data.append({
-                    'description': correction['description'],
-                    'category': correction['correct_category']
-                })
-                correction_ids.append(correction['id'])
+            descriptions = [c['description'] for c in unused_corrections]
+            categories = [c['correct_category'] for c in unused_corrections]
+            correction_ids = [c['id'] for c in unused_corrections]
             
             # Retrain the model
-            results = self.classifier.add_training_data(training_data)
+            results = self.classifier.add_training_data(descriptions=descriptions, categories=categories)
             
             if not results:
                 logger.error("Failed to retrain model")
@@ -417,20 +687,19 @@ class AITrainer:
             
             # Update training history
             self._update_training_history(results, 
-                                          corrections_applied=len(training_data),
+                                          corrections_applied=len(correction_ids),
                                           correction_ids=correction_ids)
             
             return {
                 'success': True,
                 'message': 'Model retrained successfully',
-                'corrections_applied': len(training_data),
+                'corrections_applied': len(correction_ids),
                 'model_version': self.classifier.model_version - 1,
                 'accuracy': results.get('accuracy', None)
             }
             
         except Exception as e:
-            logger.error(f"Error retraining model: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error retraining model: %s", e)
             return {
                 'success': False,
                 'message': f'Error: {str(e)}'
@@ -456,35 +725,42 @@ class AITrainer:
             logger.info(f"Updated {updated_count} corrections in database")
             
         except Exception as e:
-            logger.error(f"Error marking corrections as applied in database: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error marking corrections as applied in database: %s", e)
         
         # Also update our in-memory correction store
         # Move corrections from unused to applied
         newly_applied = []
         remaining_unused = []
+        applied_at = _now_ms()
+        applied_in_version = self.classifier.model_version - 1
+        id_set = set(correction_ids)
         
         for correction in self.corrections['unused']:
-            if correction['id'] in correction_ids:
+            if correction['id'] in id_set:
                 # Mark as applied
                 correction['is_applied'] = True
-                correction['applied_at'] = datetime.now().isoformat()
-                correction['applied_in_version'] = self.classifier.model_version - 1
+                correction['applied_at'] = applied_at
+                correction['applied_in_version'] = applied_in_version
                 newly_applied.append(correction)
+                self._pending_applied.append({
+                    'id': correction['id'],
+                    'applied_at': correction['applied_at'],
+                    'applied_in_version': correction['applied_in_version']
+                })
+                self._txid_index.pop(correction.get('transaction_id'), None)
             else:
                 remaining_unused.append(correction)
         
         # Update corrections
         self.corrections['unused'] = remaining_unused
         self.corrections['applied'].extend(newly_applied)
+        if newly_applied:
+            self._index_overrides()
         
         # Save corrections
-        self._save_corrections()
+        self._corrections_changed()
         
         logger.info(f"Marked {len(newly_applied)} corrections as applied in memory storage")
-        
-        # Reload corrections to ensure we have the latest state
-        self._load_corrections()
     
     def _update_training_history(self, results, is_initial=False, 
                                 corrections_applied=0, correction_ids=None):
@@ -497,14 +773,15 @@ class AITrainer:
             self.training_history['versions'].append(current_version)
         
         # Update last training timestamp
-        self.training_history['last_training'] = datetime.now().isoformat()
+        timestamp = datetime.now().isoformat()
+        self.training_history['last_training'] = timestamp
         
         # Update total corrections applied
         self.training_history['total_corrections_applied'] += corrections_applied
         
         # Add retraining event
         event = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'version': current_version,
             'is_initial': is_initial,
             'metrics': {
@@ -553,24 +830,13 @@ class AITrainer:
         # Check for user corrections (global override)
         try:
             desc_norm = description.strip().lower()
-            amt_norm = float(amount) if amount is not None else None
-            all_corrections = self.corrections.get('unused', []) + self.corrections.get('applied', [])
-            match = None
-            for corr in all_corrections:
-                corr_desc = str(corr.get('description', '')).strip().lower()
-                corr_amt = corr.get('amount', None)
-                # If amount is present in both, require match; else match by description only
-                if corr_desc == desc_norm:
-                    if amt_norm is not None and corr_amt is not None:
-                        try:
-                            if float(corr_amt) == amt_norm:
-                                match = corr
-                                break
-                        except Exception:
-                            continue
-                    elif amt_norm is None or corr_amt is None:
-                        match = corr
-                        break
+            # With an amount, prefer a correction for that exact amount, then
+            # one recorded without an amount; else match by description only
+            if amount is not None:
+                match = (self._override_index.get((desc_norm, float(amount)))
+                         or self._override_index.get((desc_norm, None)))
+            else:
+                match = self._description_override_index.get(desc_norm)
             if match:
                 # Correction found, override
                 return {
@@ -618,16 +884,12 @@ class AITrainer:
             float: Accuracy of the trained model
         """
         try:
-            # Import the default training data
-            from .training_data import MAIN_CATEGORY_TRAINING_DATA
-            
-            # Get the data
-            descriptions = MAIN_CATEGORY_TRAINING_DATA['descriptions']
-            categories = MAIN_CATEGORY_TRAINING_DATA['categories']
+            # Get the default training data
+            descriptions, categories, num_samples = _default_training_data()
             
             # Ensure we have enough data for each category
             # Minimum test size required is 16 (number of categories)
-            test_size = max(0.2, 16/len(descriptions))
+            test_size = max(0.2, 16/num_samples)
             
             # Train the model with a test_size that ensures at least one example of each category is in the test set
             results = self.classifier.train(descriptions, categories, test_size=test_size)
@@ -638,6 +900,27 @@ class AITrainer:
             return results.get('accuracy', 0.0)
             
         except Exception as e:
-            logger.error(f"Error training with default data: {str(e)}")
-            logger.error(traceback.format_exc())
-            return 0.0 
\ No newline at end of file
+            logger.exception("Error training with default data: %s", e)
+            return 0.0 
+
+
+def main(argv=None):
+    """Command line entry point: pretty <path> [output_path]"""
+    argv = sys.argv[1:] if argv is None else argv
+    
+    if len(argv) not in (2, 3) or argv[0] != 'pretty':
+        print("Usage: python -m ai_modules.expense_categorizer.ai_trainer pretty <path> [output_path]")
+        return 1
+    
+    try:
+        pretty = export_pretty(*argv[1:])
+    except Exception as e:
+        logger.error(f"Error exporting {argv[1]}: {str(e)}")
+        return 1
+    
+    if pretty is not None:
+        print(pretty)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,14 @@ using machine learning techniques and natural language processing.
 """
 
 import re
+import functools
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, HalvingGridSearchCV
 from sklearn.metrics import accuracy_score, classification_report, precision_score, recall_score, f1_score
 import nltk
 from nltk.corpus import stopwords
@@ -18,12 +21,14 @@ from nltk.stem import WordNetLemmatizer
 import logging
 import string
 from collections import Counter
+from itertools import islice
 import traceback
 import os
 import time
 import sys
-import json
+import orjson
 import pickle
+import joblib
 from datetime import datetime
 from pathlib import Path
 import spacy
@@ -36,6 +41,118 @@ logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum number of distinct inputs memoized by text preprocessing and lemmatization
+PREPROCESS_CACHE_SIZE = 200000
+LEMMA_CACHE_SIZE = 100000
+
+# Format of the saved lemma cache; bumped when lemmatization rules change so stale lemmas are dropped
+LEMMA_CACHE_VERSION = 2
+
+# Patterns used to clean descriptions and amount strings. Runs of anything but word
+# characters and $ become one space; the batch variant keeps the newlines that
+# separate joined texts
+_SEPARATOR_RE = re.compile(r'[^\w$]+')
+_BATCH_SEPARATOR_RE = re.compile(r'[^\w$\n]+')
+_AMOUNT_STRIP_RE = re.compile(r'[$,]')
+
+# Common subscription price points
+SUBSCRIPTION_PRICE_POINTS = (9.99, 10.99, 12.99, 14.99, 15.99, 19.99)
+SUBSCRIPTION_PRICE_ARRAY = np.array(SUBSCRIPTION_PRICE_POINTS)
+
+# Adjustments of low-confidence predictions by amount, in priority order:
+# (category, applies to large rather than small amounts, explanation)
+AMOUNT_ADJUSTMENT_RULES = (
+    ("Housing", True, " (amount-based adjustment: large amount suggests Housing category)"),
+    ("Investments", True, " (amount-based adjustment: large amount suggests Investment category)"),
+    ("Education", True, " (amount-based adjustment: large amount suggests Education category)"),
+    ("Food & Dining", False, " (amount-based adjustment: small amount suggests Food & Dining category)"),
+    ("Transportation", False, " (amount-based adjustment: small amount suggests Transportation category)"),
+)
+
+# Keyword adjustments of low-confidence predictions, in priority order:
+# (category, keywords, explanation)
+KEYWORD_RULES = (
+    ("Healthcare",
+     frozenset({'doctor', 'dentist', 'hospital', 'medical', 'health', 'prescription', 'pharmacy'}),
+     " (keyword match: medical terms suggest Healthcare category)"),
+    ("Food & Dining",
+     frozenset({'restaurant', 'grocery', 'cafe', 'coffee', 'food', 'meal', 'takeout', 'lunch', 'dinner'}),
+     " (keyword match: food terms suggest Food & Dining category)"),
+    ("Transportation",
+     frozenset({'gas', 'bus', 'train', 'taxi', 'uber', 'lyft', 'fare', 'metro', 'subway'}),
+     " (keyword match: transport terms suggest Transportation category)"),
+)
+
+# Categories suggested by subscription price points, in priority order: (category, explanation)
+PRICE_POINT_RULES = (
+    ("Entertainment", " (rule-based: subscription price point suggests Entertainment category)"),
+    ("Utilities", " (rule-based: subscription price point suggests Utilities category)"),
+)
+
+# Named entity types kept as extra tokens: ORG, PRODUCT, GPE (locations), etc.
+MEANINGFUL_ENTITY_TYPES = frozenset({'ORG', 'PRODUCT', 'GPE', 'PERSON', 'FAC', 'LOC'})
+
+# Financial and transaction-specific stopwords, added to NLTK's English list
+FINANCIAL_STOPWORDS = frozenset({
+    'payment', 'purchase', 'paid', 'pay', 'transaction', 'receipt', 'invoice',
+    'order', 'bill', 'subscription', 'charge', 'amount', 'account', 'credit',
+    'debit', 'card', 'cash', 'check', 'transfer', 'balance', 'fee', 'total',
+    'expense', 'cost', 'price', 'monthly', 'annual', 'quarterly', 'recurring',
+    'bought', 'spend', 'spent', 'date', 'money'
+})
+
+# Basic English stopwords, used when the NLTK list cannot be loaded
+BASIC_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'and', 'or', 'but', 'if', 'of', 'at', 'by',
+    'for', 'with', 'about', 'to', 'from', 'in', 'on', 'is', 'was',
+    'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does',
+    'did', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'my', 'your',
+    'his', 'her', 'its', 'our', 'their', 'this', 'that', 'these',
+    'those', 'am', 'are', 'will', 'would', 'shall', 'should', 'can',
+    'could', 'may', 'might', 'must', 'ought', 'payment', 'purchase',
+    'paid', 'pay', 'transaction', 'receipt', 'invoice', 'order', 'bill'
+})
+
+# Amount range bins (upper bounds) and the indicator features built from amounts,
+# matching the flags produced by ExpenseCategorizer._extract_amount_features
+AMOUNT_BIN_EDGES = np.array([5, 15, 30, 50, 100, 200, 500, 1000], dtype=np.float64)
+AMOUNT_FEATURE_NAMES = np.array([
+    'very_small_amount', 'small_amount', 'coffee_meal_amount', 'medium_amount',
+    'large_amount', 'xl_amount', 'xxl_amount', 'major_purchase', 'very_large_purchase',
+    'day_to_day_expense', 'significant_expense', 'round_number_amount', 'subscription_price_point'
+])
+SUBSCRIPTION_PRICE_CENTS = np.array([round(price * 100) for price in SUBSCRIPTION_PRICE_POINTS])
+SUBSCRIPTION_PRICE_CENT_SET = frozenset(SUBSCRIPTION_PRICE_CENTS.tolist())
+
+# Number of features named in a SHAP-based prediction explanation
+EXPLANATION_TOP_FEATURES = 3
+
+# Threads used by XGBoost for tree construction
+XGBOOST_N_JOBS = os.cpu_count() or 1
+
+# SpaCy components not needed for tokenization and NER
+SPACY_DISABLED_COMPONENTS = ["parser", "tagger", "attribute_ruler", "lemmatizer"]
+
+# Batch size for nlp.pipe, and the number of texts from which it uses several processes
+SPACY_BATCH_SIZE = 1024
+SPACY_PARALLEL_MIN_TEXTS = 10000
+SPACY_N_PROCESS = os.cpu_count() or 1
+
+# Compression level for saved vectorizers and RandomForest models
+MODEL_COMPRESS_LEVEL = 3
+
+# Version of the saved model files and of the preprocessing they were trained with;
+# bump it when either changes, so older saves are retrained instead of loaded
+MODEL_FORMAT_VERSION = 1
+
+# Marker file written to the NLTK data directory once all resources are verified
+NLTK_RESOURCES_STAMP = '.resources_ok'
+
+# Number of database correction lookups memoized, and how long (in seconds) they
+# are trusted before corrections written by other processes are picked up
+DB_CORRECTION_CACHE_SIZE = 50000
+DB_CORRECTION_CACHE_TTL = 60
+
 # Import the correction model for DB lookups
 def _import_ai_correction():
     try:
@@ -46,29 +163,139 @@ def _import_ai_correction():
         logger.error(f"Could not import AICorrection/db: {e}")
         return None, None
 
-# Add a helper to ExpenseCategorizer to check DB for corrections
-def _get_db_correction(self, description, amount=None):
-    """Query the database for a matching correction (global, not user-specific)."""
+@functools.lru_cache(maxsize=DB_CORRECTION_CACHE_SIZE)
+def _lookup_db_correction(norm_desc, amount_bucket, revision, ttl_bucket):
+    """
+    Query the database for the category of a matching correction (global, not user-specific)
+    
+    Memoized per (description, amount) pair. The revision and TTL bucket only take
+    part in the cache key, so answers are dropped when corrections are written in
+    this process or the TTL window passes.
+    
+    Args:
+        norm_desc (str): Stripped, lowercased description
+        amount_bucket (float): Amount rounded to cents, or None
+        revision (int): AICorrection.revision at lookup time
+        ttl_bucket (int): Current DB_CORRECTION_CACHE_TTL window
+        
+    Returns:
+        str: The corrected category, or None if there is no matching correction
+    """
     AICorrection, db = _import_ai_correction()
-    if AICorrection is None:
-        return None
-    try:
-        norm_desc = description.strip().lower()
-        query = AICorrection.query.filter(
-            AICorrection.description.ilike(norm_desc)
-        )
-        if amount is not None:
-            # Try to match amount within a small tolerance
-            query = query.filter(db.func.abs(AICorrection.amount - float(amount)) < 0.01)
-        correction = query.order_by(AICorrection.created_at.desc()).first()
-        return correction
-    except Exception as e:
-        logger.error(f"DB correction lookup failed: {e}")
-        return None
+    query = AICorrection.query.with_entities(AICorrection.correct_category).filter(
+        db.func.lower(AICorrection.description) == norm_desc
+    )
+    if amount_bucket is not None:
+        # Try to match amount within a small tolerance
+        query = query.filter(db.func.abs(AICorrection.amount - amount_bucket) < 0.01)
+    row = query.order_by(AICorrection.created_at.desc()).first()
+    return row[0] if row is not None else None
+
+def _extract_amount_features_batch(amounts):
+    """
+    Extract amount features for many transactions at once
+    
+    Args:
+        amounts (array-like): Transaction amounts, NaN where unknown
+        
+    Returns:
+        scipy.sparse.csr_matrix: float32 indicator matrix with one column per AMOUNT_FEATURE_NAMES
+            entry; rows without a usable amount are empty
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    n_bins = len(AMOUNT_BIN_EDGES) + 1
+    rows = np.flatnonzero(np.isfinite(amounts))
+    values = amounts[rows]
+    
+    # Amount range bin, then day-to-day (< 100) or significant expense
+    row_blocks = [rows, rows]
+    column_blocks = [
+        np.searchsorted(AMOUNT_BIN_EDGES, values, side='right'),
+        np.where(values < 100, n_bins, n_bins + 1)
+    ]
+    
+    # Round amounts and common subscription price points
+    cents = np.round(values * 100).astype(np.int64)
+    for column, mask in ((n_bins + 2, values == np.floor(values)),
+                         (n_bins + 3, np.isin(cents, SUBSCRIPTION_PRICE_CENTS))):
+        row_blocks.append(rows[mask])
+        column_blocks.append(np.full(np.count_nonzero(mask), column))
+    
+    row_indices = np.concatenate(row_blocks)
+    return sparse.csr_matrix(
+        (np.ones(len(row_indices), dtype=np.float32), (row_indices, np.concatenate(column_blocks))),
+        shape=(len(amounts), len(AMOUNT_FEATURE_NAMES))
+    )
+
+def _amount_feature_columns(amount):
+    """
+    Get the amount feature columns set for a single transaction
+
+    Gives the nonzero columns of the matching _extract_amount_features_batch row,
+    without building a matrix.
+
+    Args:
+        amount (float): Transaction amount, or None if unknown
+
+    Returns:
+        list: Sorted AMOUNT_FEATURE_NAMES column indices
+    """
+    if amount is None or not np.isfinite(amount):
+        return []
+
+    n_bins = len(AMOUNT_BIN_EDGES) + 1
+    columns = [
+        int(np.searchsorted(AMOUNT_BIN_EDGES, amount, side='right')),
+        n_bins if amount < 100 else n_bins + 1
+    ]
+    if amount == np.floor(amount):
+        columns.append(n_bins + 2)
+    if round(amount * 100) in SUBSCRIPTION_PRICE_CENT_SET:
+        columns.append(n_bins + 3)
+    return columns
+
+@functools.lru_cache(maxsize=8)
+def _read_corrections_file(path, mtime_ns, size):
+    """
+    Parse a user corrections file
+    
+    Reads the JSON Lines log, skipping unreadable lines such as one cut short
+    by a crash mid-append, or a single JSON document written by older versions.
+    Memoized on the file's modification time and size, so categorizers created
+    in the same process share one parse until the file changes.
+    
+    Args:
+        path (str): Corrections file path
+        mtime_ns (int): Modification time of the file, in nanoseconds
+        size (int): Size of the file in bytes
+        
+    Returns:
+        tuple: The corrections
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    
+    if content.lstrip().startswith(b'['):
+        return tuple(orjson.loads(content))
+    
+    corrections = []
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        try:
+            corrections.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            logger.warning(f"Skipping unreadable line in {path}")
+    return tuple(corrections)
 
 # Set up custom NLTK data directory to avoid permission issues
+@functools.lru_cache(maxsize=1)
 def setup_nltk_data_dir():
-    """Set up a custom NLTK data directory in the user's home directory"""
+    """
+    Set up a custom NLTK data directory in the user's home directory
+    
+    Runs once per process; later calls return the directories chosen the first time.
+    """
     # First check environment variable
     nltk_data_env = os.environ.get('NLTK_DATA')
     if nltk_data_env and os.path.exists(nltk_data_env):
@@ -156,6 +383,13 @@ def ensure_nltk_resources():
     # Get the paths where we'll download resources
     nltk_data_dir, conda_nltk_dir = setup_nltk_data_dir()
     
+    # Skip the checks if an earlier process already verified every resource
+    stamp_path = os.path.join(nltk_data_dir, NLTK_RESOURCES_STAMP)
+    if os.path.exists(stamp_path):
+        logger.info("NLTK resources already verified")
+        return
+    
+    all_resources_ok = True
     required_resources = [
         ('stopwords', 'corpora/stopwords'),
         ('wordnet', 'corpora/wordnet'),
@@ -183,6 +417,7 @@ def ensure_nltk_resources():
                         logger.warning("⚠ WordNet loaded but returned no synsets - will download again")
                         raise LookupError("WordNet verification failed")
                 except Exception:
+                    all_resources_ok = False
                     logger.warning(f"⚠ WordNet verification failed - will download again")
                     # Fall through to download
             
@@ -254,23 +489,26 @@ def ensure_nltk_resources():
                     if synsets:
                         logger.info(f"✓ WordNet is now functioning correctly")
                     else:
+                        all_resources_ok = False
                         logger.warning("⚠ WordNet still not functioning correctly")
                 except Exception as e:
+                    all_resources_ok = False
                     logger.warning(f"⚠ WordNet still not functioning correctly: {str(e)}")
             
         except LookupError as e:
+            all_resources_ok = False
             logger.error(f"❌ Failed to access {resource_name} after download attempts: {str(e)}")
             if resource_name in ['wordnet', 'omw-1.4']:
                 logger.error(f"WordNet or OMW access failed - lemmatization may be limited")
             elif resource_name == 'stopwords':
                 logger.error(f"Stopwords access failed - will use fallback stopword list")
     
-    # Reload all modules that use NLTK resources to ensure they use the new paths
-    try:
-        import nltk.corpus
-        logger.info("NLTK corpus module is available")
-    except Exception as e:
-        logger.error(f"Error importing NLTK modules: {str(e)}")
+    # Record the successful check so later imports can skip it
+    if all_resources_ok:
+        try:
+            Path(stamp_path).touch()
+        except Exception as e:
+            logger.debug(f"Could not write NLTK stamp file: {str(e)}")
 
 # Call the function to ensure resources
 ensure_nltk_resources()
@@ -414,6 +652,106 @@ CATEGORY_HIERARCHY = {
     ]
 }
 
+# Category lists used by categorizers, computed once
+MAIN_CATEGORIES = tuple(sys.intern(category) for category in CATEGORY_HIERARCHY)
+DETAILED_CATEGORIES = tuple(
+    sys.intern(subcategory)
+    for subcategories in CATEGORY_HIERARCHY.values()
+    for subcategory in subcategories
+)
+
+# Common English lemmatization rules of FallbackLemmatizer (suffix -> replacement).
+# When several suffixes match, the longest one wins
+LEMMA_SUFFIX_RULES = {
+    # Plural forms
+    'ies': 'y',       # categories -> category, applies -> apply
+    'es': '',         # boxes -> box
+    's': '',          # cats -> cat
+    
+    # Verb forms
+    'ing': '',        # running -> run
+    'ed': '',         # walked -> walk
+    'ied': 'y',       # studied -> study
+    'ying': 'y',      # studying -> study
+    
+    # Adjective forms
+    'est': '',        # biggest -> big
+    'er': '',         # bigger -> big
+    
+    # Noun forms
+    'ment': '',       # payment -> pay
+    'ence': 'e',      # difference -> differ
+    'ance': '',       # performance -> perform
+    'ity': '',        # activity -> active
+    'ism': '',        # capitalism -> capital
+    'tion': 't',      # creation -> create
+    'sion': 'd',      # expansion -> expand
+}
+
+# Words that FallbackLemmatizer never stems
+LEMMA_EXCEPTIONS = frozenset({
+    'business', 'news', 'paris', 'this', 'was', 'is', 'has', 'gas', 'bus',
+    'series', 'species', 'analysis', 'basis', 'crisis', 'thesis',
+    'status', 'virus', 'bonus', 'minus', 'campus', 'texas', 'vegas'
+})
+
+# Irregular word forms mapped to their lemmas by FallbackLemmatizer
+LEMMA_IRREGULAR_FORMS = {
+    'are': 'be',
+    'were': 'be',
+    'is': 'be',
+    'am': 'be',
+    'was': 'be',
+    'being': 'be',
+    'been': 'be',
+    'had': 'have',
+    'has': 'have',
+    'having': 'have',
+    'does': 'do',
+    'did': 'do',
+    'doing': 'do',
+    'done': 'do',
+    'went': 'go',
+    'going': 'go',
+    'goes': 'go',
+    'gone': 'go',
+    'made': 'make',
+    'making': 'make',
+    'makes': 'make',
+    'said': 'say',
+    'saying': 'say',
+    'says': 'say',
+    'bought': 'buy',
+    'buying': 'buy',
+    'buys': 'buy',
+    'took': 'take',
+    'taking': 'take',
+    'takes': 'take',
+    'taken': 'take',
+}
+
+def _build_suffix_trie(rules):
+    """
+    Build a trie of reversed suffixes for matching word endings
+    
+    Args:
+        rules (dict): Suffix -> replacement rules
+        
+    Returns:
+        dict: Nested dicts keyed by character, starting from the last one; the node
+            ending a suffix stores (suffix_length, replacement, min_word_length) under
+            the None key, where min_word_length keeps the stem at least 2 chars
+    """
+    trie = {}
+    for suffix, replacement in rules.items():
+        node = trie
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        node[None] = (len(suffix), replacement, len(suffix) - len(replacement) + 2)
+    return trie
+
+_SUFFIX_TRIE = _build_suffix_trie(LEMMA_SUFFIX_RULES)
+
 class FallbackLemmatizer:
     """
     A robust fallback lemmatizer that can be used if NLTK's WordNetLemmatizer fails.
@@ -421,78 +759,13 @@ class FallbackLemmatizer:
     """
     
     def __init__(self):
-        # Common English lemmatization rules (suffix -> replacement)
-        self.rules = {
-            # Plural forms
-            'ies': 'y',       # categories -> category
-            'es': '',         # boxes -> box
-            's': '',          # cats -> cat
-            
-            # Verb forms
-            'ing': '',        # running -> run
-            'ed': '',         # walked -> walk
-            'ied': 'y',       # studied -> study
-            'ying': 'y',      # studying -> study
-            'ies': 'y',       # applies -> apply
-            
-            # Adjective forms
-            'est': '',        # biggest -> big
-            'er': '',         # bigger -> big
-            
-            # Noun forms
-            'ment': '',       # payment -> pay
-            'ence': 'e',      # difference -> differ
-            'ance': '',       # performance -> perform
-            'ity': '',        # activity -> active
-            'ism': '',        # capitalism -> capital
-            'tion': 't',      # creation -> create
-            'sion': 'd',      # expansion -> expand
-        }
-        
-        # Exception list for words that shouldn't be stemmed
-        self.exceptions = {
-            'business', 'news', 'paris', 'this', 'was', 'is', 'has', 'gas', 'bus',
-            'series', 'species', 'analysis', 'basis', 'crisis', 'thesis',
-            'status', 'virus', 'bonus', 'minus', 'campus', 'texas', 'vegas'
-        }
-        
-        # Common irregular forms mapping
-        self.irregular_forms = {
-            'are': 'be',
-            'were': 'be',
-            'is': 'be',
-            'am': 'be',
-            'was': 'be',
-            'being': 'be',
-            'been': 'be',
-            'had': 'have',
-            'has': 'have',
-            'having': 'have',
-            'does': 'do',
-            'did': 'do',
-            'doing': 'do',
-            'done': 'do',
-            'went': 'go',
-            'going': 'go',
-            'goes': 'go',
-            'gone': 'go',
-            'made': 'make',
-            'making': 'make',
-            'makes': 'make',
-            'said': 'say',
-            'saying': 'say',
-            'says': 'say',
-            'bought': 'buy',
-            'buying': 'buy',
-            'buys': 'buy',
-            'took': 'take',
-            'taking': 'take',
-            'takes': 'take',
-            'taken': 'take',
-        }
+        # Suffix rules, exceptions and irregular forms, shared by all instances
+        self.rules = LEMMA_SUFFIX_RULES
+        self.exceptions = LEMMA_EXCEPTIONS
+        self.irregular_forms = LEMMA_IRREGULAR_FORMS
         
         # Cache for previously lemmatized words to improve performance
-        self.cache = {}
+        self._lemmatize_cached = functools.lru_cache(maxsize=LEMMA_CACHE_SIZE)(self._lemmatize_word)
     
     def lemmatize(self, word, pos=None):
         """
@@ -510,58 +783,102 @@ class FallbackLemmatizer:
             return "" if word is None else str(word)
         
         # Convert to lowercase for consistency
-        word = word.lower()
-        
-        # Check cache first
-        if word in self.cache:
-            return self.cache[word]
+        return self._lemmatize_cached(word.lower())
+    
+    def lemmatize_many(self, words):
+        """
+        Lemmatize a batch of words
         
+        Args:
+            words (list): The words to lemmatize
+            
+        Returns:
+            list: The lemmatized words, in the same order
+        """
+        return list(map(self.lemmatize, words))
+    
+    def _lemmatize_word(self, word):
+        """Apply the lemmatization rules to a lowercase word (memoized by lemmatize)"""
         # Check exceptions - words that shouldn't be stemmed
         if word in self.exceptions:
-            self.cache[word] = word
             return word
             
         # Check irregular forms
-        if word in self.irregular_forms:
-            self.cache[word] = self.irregular_forms[word]
-            return self.irregular_forms[word]
+        lemma = self.irregular_forms.get(word)
+        if lemma is not None:
+            return lemma
             
         # For very short words, don't apply rules
         if len(word) <= 3:
-            self.cache[word] = word
             return word
             
         # Special case for double consonant + 'ing' or 'ed'
         if (word.endswith('ing') and len(word) > 5 and
             word[-4] == word[-5] and word[-4] not in 'aeiou'):
             # running -> run (remove -ning)
-            result = word[:-4]
-            self.cache[word] = result
-            return result
+            return word[:-4]
         
         if (word.endswith('ed') and len(word) > 4 and
             word[-3] == word[-4] and word[-3] not in 'aeiou'):
             # stopped -> stop (remove -ped)
-            result = word[:-3]
-            self.cache[word] = result
-            return result
-        
-        # Try each suffix rule
-        original_word = word
-        for suffix, replacement in self.rules.items():
-            if word.endswith(suffix):
-                # Only apply if the stem would be at least 2 chars
-                stem_length = len(word) - len(suffix) + len(replacement)
-                if stem_length >= 2:
-                    word = word[:-len(suffix)] + replacement
-                    break
+            return word[:-3]
+        
+        # Walk the suffix trie from the end of the word, collecting the rules
+        # passed, then apply the longest one that leaves a long enough stem
+        matches = []
+        node = _SUFFIX_TRIE
+        for char in reversed(word):
+            node = node.get(char)
+            if node is None:
+                break
+            rule = node.get(None)
+            if rule is not None:
+                matches.append(rule)
         
-        # Only update cache if word was actually changed
-        if word != original_word:
-            self.cache[original_word] = word
+        for suffix_length, replacement, min_word_length in reversed(matches):
+            if len(word) >= min_word_length:
+                return word[:-suffix_length] + replacement
             
         return word
 
+class _XGBoostShapExplainer:
+    """
+    SHAP explainer backed by XGBoost's own TreeSHAP implementation
+    
+    Offers the shap_values interface of shap.TreeExplainer for multiclass models.
+    On a CUDA device XGBoost computes the contributions with GPUTreeShap.
+    """
+    
+    def __init__(self, booster, device='cpu'):
+        """
+        Args:
+            booster (xgboost.Booster): The trained booster
+            device (str): Device to compute SHAP values on
+        """
+        if device != 'cpu':
+            # Leave the model's own booster predicting on the CPU
+            booster = booster.copy()
+            booster.set_param({'device': device})
+        self.booster = booster
+    
+    def shap_values(self, X):
+        """
+        Compute SHAP values
+        
+        Args:
+            X: Vectorized input
+            
+        Returns:
+            list: One (n_samples, n_features) array per class
+        """
+        contributions = self.booster.predict(xgb.DMatrix(X), pred_contribs=True)
+        if contributions.ndim == 2:
+            # Binary models have a single output
+            contributions = contributions[:, np.newaxis, :]
+        
+        # The last column holds the bias term
+        return [contributions[:, k, :-1] for k in range(contributions.shape[1])]
+
 class ExpenseCategorizer:
     """
     A machine learning model for expense categorization.
@@ -569,26 +886,37 @@ class ExpenseCategorizer:
     into predefined spending categories.
     """
     
-    def __init__(self, use_detailed_categories=False):
+    def __init__(self, use_detailed_categories=False, use_gpu=False, use_fast_tokenize=False):
         """
         Initialize the expense categorizer
         
         Args:
             use_detailed_categories (bool): Whether to use detailed subcategories
                                             instead of main categories
+            use_gpu (bool): Whether to train XGBoost models on a CUDA device
+            use_fast_tokenize (bool): Whether to tokenize by splitting the cleaned text
+                                      instead of running SpaCy (no named entities)
         """
         self.model = None
+        self.use_gpu = use_gpu
+        self.use_fast_tokenize = use_fast_tokenize
         self.vectorizer = None
-        self.categories = list(CATEGORY_HIERARCHY.keys())
+        self._analyzer = None  # The fitted vectorizer's analyzer, for single-text vectorizing
+        self._feature_names = None  # Names of the model's input features, set on first use
+        self.categories = MAIN_CATEGORIES
+        self._class_index = None  # Category name -> model class index, set by train
         self.nlp = None
         
-        # Try to load SpaCy model for better NLP processing
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-            logger.info("Successfully loaded SpaCy model for NER")
-        except Exception as e:
-            logger.warning(f"Could not load SpaCy model: {str(e)}")
-            logger.info("Named Entity Recognition will not be available")
+        # Try to load SpaCy model for better NLP processing (not needed when
+        # tokenizing by splitting, as the cleaned text is already space-separated words)
+        if not use_fast_tokenize:
+            try:
+                # Only the tokenizer and NER are used, so skip the other components
+                self.nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLED_COMPONENTS)
+                logger.info("Successfully loaded SpaCy model for NER")
+            except Exception as e:
+                logger.warning(f"Could not load SpaCy model: {str(e)}")
+                logger.info("Named Entity Recognition will not be available")
         
         # Try to initialize NLTK lemmatizer, fall back to simple if it fails
         try:
@@ -621,43 +949,48 @@ class ExpenseCategorizer:
         
         # Try to initialize stopwords, fall back to a basic list if it fails
         try:
-            self.stop_words = set(stopwords.words('english'))
-            # Add additional financial and transaction-specific stopwords
-            financial_stopwords = {
-                'payment', 'purchase', 'paid', 'pay', 'transaction', 'receipt', 'invoice',
-                'order', 'bill', 'subscription', 'charge', 'amount', 'account', 'credit',
-                'debit', 'card', 'cash', 'check', 'transfer', 'balance', 'fee', 'total',
-                'expense', 'cost', 'price', 'monthly', 'annual', 'quarterly', 'recurring',
-                'purchase', 'bought', 'paid', 'spend', 'spent', 'payment', 'date', 'money'
-            }
-            self.stop_words.update(financial_stopwords)
+            self.stop_words = frozenset(stopwords.words('english')) | FINANCIAL_STOPWORDS
         except Exception as e:
             logger.warning(f"Could not load NLTK stopwords: {str(e)}")
             logger.info("Using basic stopword list")
-            # Basic English stopwords
-            self.stop_words = {
-                'a', 'an', 'the', 'and', 'or', 'but', 'if', 'of', 'at', 'by', 
-                'for', 'with', 'about', 'to', 'from', 'in', 'on', 'is', 'was', 
-                'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 
-                'did', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'my', 'your', 
-                'his', 'her', 'its', 'our', 'their', 'this', 'that', 'these', 
-                'those', 'am', 'are', 'will', 'would', 'shall', 'should', 'can', 
-                'could', 'may', 'might', 'must', 'ought', 'payment', 'purchase', 
-                'paid', 'pay', 'transaction', 'receipt', 'invoice', 'order', 'bill'
-            }
+            self.stop_words = BASIC_STOPWORDS
+        
+        # Memoize preprocessing, since the same merchant descriptions recur
+        # across transactions, training runs and predictions
+        self._preprocess_cached = functools.lru_cache(maxsize=PREPROCESS_CACHE_SIZE)(self._preprocess_text)
         
         self.use_detailed_categories = use_detailed_categories
         self.feature_importances = {}
         self.category_keywords = {}
         self.model_type = "xgboost"  # Default to XGBoost
+        self.use_amount_features = False  # Whether the model was trained with amount features
         self.shap_explainer = None
         self.corrections_data = []
         
-        # Path for storing corrections data
+        # (mtime_ns, size) of the corrections file that corrections_data reflects,
+        # and of the one the current model was trained with
+        self._corrections_stamp = None
+        self._trained_corrections_stamp = None
+        
+        # Path for storing corrections data, an append-only JSON Lines log
         self.corrections_path = os.path.join(
             os.path.dirname(os.path.abspath(__file__)),
             "data",
-            "user_corrections.json"
+            "user_corrections.jsonl"
+        )
+        
+        # Corrections saved as a single JSON document by older versions, read
+        # until the first correction is appended to the log
+        self.legacy_corrections_path = os.path.join(os.path.dirname(self.corrections_path), "user_corrections.json")
+        
+        # Path for storing the lemmas of previously seen tokens
+        self.lemma_cache_path = os.path.join(os.path.dirname(self.corrections_path), "lemma_cache.pkl")
+        
+        # Base path of the model saved after every training run, loaded instead of retraining
+        self.model_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "models",
+            "categorizer_detailed" if use_detailed_categories else "categorizer_main"
         )
         
         # Create directory if it doesn't exist
@@ -666,27 +999,78 @@ class ExpenseCategorizer:
         # Load any existing corrections
         self._load_corrections()
         
+        # Load lemmas computed by earlier training runs
+        self._lemma_cache = {}
+        self._load_lemma_cache()
+        
         # Detailed categories include all subcategories
         if use_detailed_categories:
-            self.categories = []
-            for main_category, subcategories in CATEGORY_HIERARCHY.items():
-                self.categories.extend(subcategories)
+            self.categories = DETAILED_CATEGORIES
             logger.info(f"Using {len(self.categories)} detailed categories")
         else:
             logger.info(f"Using {len(self.categories)} main categories")
     
     def _load_corrections(self):
         """Load user corrections from the stored file"""
-        if os.path.exists(self.corrections_path):
+        self.corrections_data = []
+        self._corrections_by_desc = {}
+        self._corrections_stamp = None
+        path = self.corrections_path
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            path = self.legacy_corrections_path
             try:
-                with open(self.corrections_path, 'r') as f:
-                    self.corrections_data = json.load(f)
-                logger.info(f"Loaded {len(self.corrections_data)} user corrections from {self.corrections_path}")
-            except Exception as e:
-                logger.warning(f"Could not load user corrections: {str(e)}")
-                self.corrections_data = []
-        else:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return
+        
+        try:
+            # Copy the shared parsed list, since add_user_correction appends to it
+            self.corrections_data = list(_read_corrections_file(path, stat.st_mtime_ns, stat.st_size))
+            self._corrections_stamp = (stat.st_mtime_ns, stat.st_size)
+            logger.info(f"Loaded {len(self.corrections_data)} user corrections from {path}")
+        except Exception as e:
+            logger.warning(f"Could not load user corrections: {str(e)}")
             self.corrections_data = []
+        
+        for correction in self.corrections_data:
+            self._index_correction(correction)
+    
+    @staticmethod
+    def _normalize(description):
+        """Normalize a description for case-insensitive correction matching"""
+        return description.strip().casefold()
+    
+    def _index_correction(self, correction):
+        """Add a correction to the index of corrections by normalized description, most recent last"""
+        key = self._normalize(correction.get("description", ""))
+        self._corrections_by_desc.setdefault(key, []).append(correction)
+    
+    def _get_db_correction(self, description, amount=None):
+        """
+        Look up the corrected category for a description in the database
+        
+        Args:
+            description (str): The expense description
+            amount (float, optional): The amount of the expense
+            
+        Returns:
+            str: The corrected category, or None if there is no matching correction
+        """
+        AICorrection, db = _import_ai_correction()
+        if AICorrection is None:
+            return None
+        try:
+            norm_desc = description.strip().lower()
+            amount_bucket = None if amount is None else round(float(amount), 2)
+            return _lookup_db_correction(
+                norm_desc, amount_bucket, AICorrection.revision,
+                int(time.monotonic() // DB_CORRECTION_CACHE_TTL)
+            )
+        except Exception as e:
+            logger.error(f"DB correction lookup failed: {e}")
+            return None
     
     def preprocess_text(self, text):
         """
@@ -700,44 +1084,103 @@ class ExpenseCategorizer:
         """
         if not text or not isinstance(text, str):
             return ""
-            
-        # Convert to lowercase
-        text = text.lower()
         
-        # Remove special characters and digits (keeping $ for amount detection)
-        text = re.sub(r'[^\w\s$]', ' ', text)
+        return self._preprocess_cached(text)
+    
+    def _preprocess_text(self, text):
+        """Preprocess a non-empty string (memoized by preprocess_text)"""
+        text = self._clean_text(text)
         
-        # Extract named entities if SpaCy is available
+        # Tokenize and extract named entities using SpaCy if available
         extracted_entities = []
         if self.nlp:
             try:
-                doc = self.nlp(text)
-                # Extract meaningful entity types: ORG, PRODUCT, GPE (locations), etc.
-                meaningful_types = {'ORG', 'PRODUCT', 'GPE', 'PERSON', 'FAC', 'LOC'}
-                extracted_entities = [ent.text.lower() for ent in doc.ents if ent.label_ in meaningful_types]
+                tokens, extracted_entities = self._tokens_and_entities(self.nlp(text))
             except Exception as e:
-                logger.debug(f"Error during NER: {str(e)}")
+                logger.debug(f"Error in SpaCy processing: {str(e)}")
+                tokens = text.split()
+        else:
+            # Simple tokenization (split by spaces)
+            tokens = text.split()
         
-        # Replace multiple spaces with single space
-        text = re.sub(r'\s+', ' ', text)
+        return self._finish_tokens(tokens, extracted_entities)
+    
+    def preprocess_batch(self, texts):
+        """
+        Preprocess many texts, running SpaCy over them in batches
         
-        # Tokenize using SpaCy if available
-        tokens = []
-        if self.nlp:
+        Args:
+            texts (list): The texts to preprocess
+            
+        Returns:
+            list: Preprocessed texts, in the same order
+        """
+        # Each distinct valid text is processed once
+        unique_texts = list(dict.fromkeys(t for t in texts if isinstance(t, str) and t))
+        cleaned = self._clean_texts(unique_texts)
+        
+        # Tokenize and extract named entities using SpaCy if available
+        parsed = None
+        if self.nlp and cleaned:
+            n_process = SPACY_N_PROCESS if len(cleaned) >= SPACY_PARALLEL_MIN_TEXTS else 1
             try:
-                doc = self.nlp(text)
-                tokens = [token.text for token in doc]
+                docs = self.nlp.pipe(cleaned, batch_size=SPACY_BATCH_SIZE, n_process=n_process)
+                parsed = [self._tokens_and_entities(doc) for doc in docs]
             except Exception as e:
-                logger.debug(f"Error in SpaCy tokenization: {str(e)}")
-                tokens = text.split()
-        else:
+                logger.debug(f"Error in SpaCy batch processing: {str(e)}")
+        
+        if parsed is None:
             # Simple tokenization (split by spaces)
-            tokens = text.split()
+            parsed = [(text.split(), []) for text in cleaned]
+        
+        # Lemmatize the batch's distinct new tokens in one call
+        self._lemmatize_many({
+            token for tokens, _ in parsed for token in tokens
+            if token not in self.stop_words and len(token) > 2
+        } - self._lemma_cache.keys())
+        
+        processed = {
+            text: self._finish_tokens(tokens, entities)
+            for text, (tokens, entities) in zip(unique_texts, parsed)
+        }
         
+        return [processed.get(t, "") if isinstance(t, str) else "" for t in texts]
+    
+    def _clean_text(self, text):
+        """Lowercase text and reduce it to words separated by single spaces"""
+        # Replace special characters and whitespace runs with a single space (keeping $ for amount detection)
+        return _SEPARATOR_RE.sub(' ', text.lower())
+    
+    def _clean_texts(self, texts):
+        """
+        Clean many texts, as _clean_text does, with one regex pass over the joined texts
+        
+        Args:
+            texts (list): The texts to clean
+            
+        Returns:
+            list: Cleaned texts, in the same order
+        """
+        joined = "\n".join(texts)
+        if joined.count("\n") != len(texts) - 1:
+            # Some texts contain newlines themselves, so they can't be split apart again
+            return [self._clean_text(text) for text in texts]
+        
+        return _BATCH_SEPARATOR_RE.sub(' ', joined.lower()).split("\n")
+    
+    def _tokens_and_entities(self, doc):
+        """Get the tokens and meaningful named entities of a SpaCy Doc"""
+        tokens = [token.text for token in doc]
+        extracted_entities = [ent.text.lower() for ent in doc.ents if ent.label_ in MEANINGFUL_ENTITY_TYPES]
+        return tokens, extracted_entities
+    
+    def _finish_tokens(self, tokens, extracted_entities):
+        """Drop stopwords, lemmatize and append named entities"""
         # Remove stopwords and lemmatize
         try:
+            lemmas = self._lemma_cache
             processed_tokens = [
-                self.lemmatizer.lemmatize(token) for token in tokens 
+                lemmas.get(token) or self._lemmatize(token) for token in tokens 
                 if token not in self.stop_words and len(token) > 2
             ]
         except Exception as e:
@@ -754,6 +1197,64 @@ class ExpenseCategorizer:
         
         return " ".join(processed_tokens)
     
+    def _lemmatize(self, token):
+        """Lemmatize a token not yet in the lemma cache, and cache the result"""
+        lemma = self.lemmatizer.lemmatize(token)
+        if len(self._lemma_cache) < LEMMA_CACHE_SIZE:
+            self._lemma_cache[token] = lemma
+        return lemma
+    
+    def _lemmatize_many(self, tokens):
+        """Lemmatize tokens not yet in the lemma cache together, and cache the results"""
+        if not tokens:
+            return
+        
+        tokens = list(tokens)
+        try:
+            lemmatize_many = getattr(self.lemmatizer, 'lemmatize_many', None)
+            if lemmatize_many is not None:
+                lemmas = lemmatize_many(tokens)
+            else:
+                lemmas = [self.lemmatizer.lemmatize(token) for token in tokens]
+        except Exception as e:
+            # Left to the per-token path, which falls back to unlemmatized tokens
+            logger.warning(f"Error in batch lemmatization: {str(e)}")
+            return
+        
+        room = max(LEMMA_CACHE_SIZE - len(self._lemma_cache), 0)
+        self._lemma_cache.update(islice(zip(tokens, lemmas), room))
+    
+    def _load_lemma_cache(self):
+        """Load the lemma cache saved by an earlier training run"""
+        if not os.path.exists(self.lemma_cache_path):
+            return
+        
+        try:
+            with open(self.lemma_cache_path, 'rb') as f:
+                saved = pickle.load(f)
+            
+            # Lemmas from another lemmatizer (e.g. WordNet vs. the fallback) would differ
+            if (saved.get('version') == LEMMA_CACHE_VERSION
+                    and saved.get('lemmatizer') == type(self.lemmatizer).__name__):
+                self._lemma_cache = saved['lemmas']
+                logger.info(f"Loaded {len(self._lemma_cache)} cached lemmas")
+        except Exception as e:
+            logger.warning(f"Could not load lemma cache: {str(e)}")
+    
+    def _save_lemma_cache(self):
+        """Save the lemma cache so later processes start with it"""
+        try:
+            with open(self.lemma_cache_path, 'wb') as f:
+                pickle.dump({
+                    'version': LEMMA_CACHE_VERSION,
+                    'lemmatizer': type(self.lemmatizer).__name__,
+                    'lemmas': self._lemma_cache
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not save lemma cache: {str(e)}")
+            return False
+    
     def _extract_amount_features(self, amount):
         """
         Extract features from the amount to enhance categorization with more granular ranges
@@ -772,7 +1273,7 @@ class ExpenseCategorizer:
         # Convert to float if needed
         if isinstance(amount, str):
             try:
-                amount = float(amount.replace('$', '').replace(',', ''))
+                amount = float(_AMOUNT_STRIP_RE.sub('', amount))
             except:
                 return features
         
@@ -807,15 +1308,14 @@ class ExpenseCategorizer:
             features['round_number_amount'] = True
             
         # Common subscription price points
-        subscription_price_points = [9.99, 10.99, 12.99, 14.99, 15.99, 19.99]
-        for price in subscription_price_points:
+        for price in SUBSCRIPTION_PRICE_POINTS:
             if abs(amount - price) < 0.01:
                 features['subscription_price_point'] = True
                 break
             
         return features
     
-    def train(self, descriptions, categories, amounts=None, grid_search=False):
+    def train(self, descriptions, categories, amounts=None, grid_search=False, use_gpu=None):
         """
         Train the categorization model with enhanced features and XGBoost
         
@@ -824,6 +1324,7 @@ class ExpenseCategorizer:
             categories (list): List of corresponding categories
             amounts (list, optional): List of transaction amounts
             grid_search (bool): Whether to use grid search for hyperparameter tuning
+            use_gpu (bool, optional): Override the use_gpu setting for this training run
             
         Returns:
             dict: Dictionary with model performance metrics
@@ -839,7 +1340,7 @@ class ExpenseCategorizer:
         logger.info(f"Training with amount data: {has_amounts}")
         
         # Preprocess descriptions
-        processed_descriptions = [self.preprocess_text(desc) for desc in descriptions]
+        processed_descriptions = self.preprocess_batch(descriptions)
         
         # Create DataFrame
         data = pd.DataFrame({
@@ -850,23 +1351,33 @@ class ExpenseCategorizer:
         if has_amounts:
             data['amount'] = amounts
         
-        # Remove empty descriptions
-        data = data[data['description'].str.strip() != '']
+        # Remove empty descriptions (preprocessing already stripped them)
+        data = data[data['description'].str.len() > 0]
         
         if len(data) == 0:
             raise ValueError("No valid training data after preprocessing")
             
         # Add user corrections to training data if available
         if self.corrections_data:
-            for correction in self.corrections_data:
-                if 'description' in correction and 'category' in correction:
-                    processed_desc = self.preprocess_text(correction['description'])
-                    if processed_desc:  # Only add if valid after preprocessing
-                        new_row = {'description': processed_desc, 'category': correction['category']}
-                        if 'amount' in correction and has_amounts:
-                            new_row['amount'] = float(correction['amount'])
-                        # Add to dataframe with index handling
-                        data = pd.concat([data, pd.DataFrame([new_row])], ignore_index=True)
+            valid_corrections = [
+                correction for correction in self.corrections_data
+                if 'description' in correction and 'category' in correction
+            ]
+            processed_corrections = self.preprocess_batch(
+                [correction['description'] for correction in valid_corrections]
+            )
+            
+            new_rows = []
+            for correction, processed_desc in zip(valid_corrections, processed_corrections):
+                if processed_desc:  # Only add if valid after preprocessing
+                    new_row = {'description': processed_desc, 'category': correction['category']}
+                    if 'amount' in correction and has_amounts:
+                        new_row['amount'] = float(correction['amount'])
+                    new_rows.append(new_row)
+            
+            # Add to dataframe in one step, with index handling
+            if new_rows:
+                data = pd.concat([data, pd.DataFrame(new_rows)], ignore_index=True)
             
             logger.info(f"Added {len(self.corrections_data)} user corrections to training data")
             
@@ -878,86 +1389,73 @@ class ExpenseCategorizer:
         label_encoder = LabelEncoder()
         encoded_categories = label_encoder.fit_transform(data['category'])
         self.label_encoder = label_encoder  # Save for later use
+        self._class_index = {category: i for i, category in enumerate(label_encoder.classes_)}
         
         # Split features and labels
         X = data['description']
         y = encoded_categories  # Use encoded categories
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
+        # Split data (row indices are split too, to select the matching amount features)
+        X_train, X_test, y_train, y_test, rows_train, rows_test = train_test_split(
             X, 
             y, 
+            np.arange(len(data)),
             test_size=0.2,
             random_state=42,
             stratify=y
         )
         
         # Initialize vectorizer
+        # float32 halves the TF-IDF matrices, and is the precision XGBoost uses internally,
+        # so the matrices reach the booster without another converted copy
         self.vectorizer = TfidfVectorizer(
             max_features=5000,
             min_df=2,
             max_df=0.8,
-            ngram_range=(1, 2)
+            ngram_range=(1, 2),
+            dtype=np.float32
         )
         
         # Fit vectorizer on training data
         X_train_vec = self.vectorizer.fit_transform(X_train)
         X_test_vec = self.vectorizer.transform(X_test)
+        self._analyzer = self.vectorizer.build_analyzer()
         
-        # Get features and calculate category keywords
-        feature_names = self.vectorizer.get_feature_names_out()
+        # Append amount features when amounts were provided
+        self.use_amount_features = has_amounts
+        if has_amounts:
+            amount_features = _extract_amount_features_batch(
+                pd.to_numeric(data['amount'], errors='coerce').to_numpy(dtype=np.float64)
+            )
+            X_train_vec = sparse.hstack([X_train_vec, amount_features[rows_train]], format='csr')
+            X_test_vec = sparse.hstack([X_test_vec, amount_features[rows_test]], format='csr')
+        
+        # Get the new vocabulary's feature names (stored for explanations) and
+        # calculate category keywords
+        self._feature_names = None
+        feature_names = self._get_feature_names()
         
         # Use original categories for keywords (not encoded)
-        # Fix for numpy.ndarray not having index attribute
-        if hasattr(y_train, 'index'):
-            y_train_original = data['category'].iloc[y_train.index]
-        else:
-            # For numpy arrays, we recreate the mapping based on the original indices before splitting
-            train_indices = np.arange(len(X))[np.isin(np.arange(len(X)), np.arange(len(X_train)))]
-            y_train_original = data['category'].iloc[train_indices].reset_index(drop=True)
+        y_train_original = label_encoder.classes_[y_train]
         
         self._build_category_keywords(X_train_vec, y_train_original, feature_names)
         
         # Train appropriate model based on model_type
         if self.model_type == "xgboost":
-            if grid_search:
-                logger.info("Using grid search for XGBoost hyperparameter tuning")
-                param_grid = {
-                    'n_estimators': [100, 200, 300],
-                    'max_depth': [3, 5, 7],
-                    'learning_rate': [0.01, 0.1, 0.2],
-                    'subsample': [0.8, 1.0],
-                    'colsample_bytree': [0.8, 1.0]
-                }
-                
-                self.model = GridSearchCV(
-                    xgb.XGBClassifier(
-                        objective='multi:softprob',
-                        random_state=42
-                    ),
-                    param_grid,
-                    cv=5,
-                    n_jobs=-1,
-                    verbose=1,
-                    scoring='f1_weighted'
-                )
-                
-                self.model.fit(X_train_vec, y_train)
-                logger.info(f"Best parameters: {self.model.best_params_}")
-                self.model = self.model.best_estimator_
-            else:
-                # Initialize and train model with sensible defaults
-                self.model = xgb.XGBClassifier(
-                    n_estimators=200,
-                    max_depth=5,
-                    learning_rate=0.1,
-                    subsample=0.8,
-                    colsample_bytree=0.8,
-                    objective='multi:softprob',
-                    random_state=42
-                )
-                
-                self.model.fit(X_train_vec, y_train)
+            device = self._get_xgboost_device(use_gpu)
+            
+            try:
+                self._fit_xgboost(X_train_vec, y_train, device, grid_search)
+            except Exception as e:
+                if device != 'cuda':
+                    raise
+                logger.warning(f"XGBoost training on CUDA failed, training on the CPU: {str(e)}")
+                device = 'cpu'
+                self._fit_xgboost(X_train_vec, y_train, device, grid_search)
+            
+            # Predict on the CPU: inputs are small host-side sparse matrices
+            if device == 'cuda':
+                self.model.set_params(device='cpu')
         else:
             # Fallback to RandomForest if XGBoost not specified
             logger.info("Using RandomForest classifier as fallback")
@@ -974,11 +1472,15 @@ class ExpenseCategorizer:
             self.model.fit(X_train_vec, y_train)
         
         # Create SHAP explainer (for XGBoost only)
-        if self.model_type == "xgboost":
+        if self.model_type == "xgboost" and device == 'cuda':
+            # XGBoost computes the SHAP values itself on the GPU (GPUTreeShap)
+            self.shap_explainer = _XGBoostShapExplainer(self.model.get_booster(), device)
+            logger.info("GPU SHAP explainer created successfully")
+        elif self.model_type == "xgboost":
             try:
-                # Only use a subset of training data for computational efficiency
-                explainer_train = X_train_vec[:min(500, X_train_vec.shape[0])]
-                self.shap_explainer = shap.TreeExplainer(self.model, explainer_train)
+                # Path-dependent SHAP uses the trees' own cover statistics, so no
+                # background sample of the training data is needed
+                self.shap_explainer = shap.TreeExplainer(self.model, feature_perturbation='tree_path_dependent')
                 logger.info("SHAP explainer created successfully")
             except Exception as e:
                 logger.warning(f"Could not create SHAP explainer: {str(e)}")
@@ -1001,6 +1503,13 @@ class ExpenseCategorizer:
         # Store feature importances
         self._store_feature_importances(feature_names)
         
+        # Preprocessing the corpus has filled the lemma cache with its vocabulary
+        self._save_lemma_cache()
+        
+        # Refresh the saved model, so later processes load it instead of a stale one
+        self._trained_corrections_stamp = self._corrections_stamp
+        self.save_model(self.model_path)
+        
         return {
             'accuracy': accuracy,
             'precision': precision,
@@ -1009,6 +1518,255 @@ class ExpenseCategorizer:
             'report': report
         }
     
+    def save_model(self, path):
+        """
+        Save the trained model and its preprocessing state
+        
+        XGBoost models are written in the booster's native UBJSON format
+        (path + '.ubj'), which loads much faster than a pickled classifier; a
+        RandomForest model is written with joblib (path + '.joblib'). The vectorizer,
+        label encoder and other state go to path + '.state.joblib', along with
+        MODEL_FORMAT_VERSION and the stamp of the corrections file the model was
+        trained with.
+        
+        Args:
+            path (str): Base path for the saved files, without extension
+            
+        Returns:
+            bool: Success flag
+        """
+        if self.model is None:
+            logger.error("Cannot save model: model has not been trained")
+            return False
+        
+        try:
+            if self.model_type == "xgboost":
+                self.model.save_model(path + '.ubj')
+            else:
+                joblib.dump(self.model, path + '.joblib', compress=MODEL_COMPRESS_LEVEL)
+            
+            joblib.dump({
+                'model_type': self.model_type,
+                'vectorizer': self.vectorizer,
+                'label_encoder': getattr(self, 'label_encoder', None),
+                'use_amount_features': self.use_amount_features,
+                'use_detailed_categories': self.use_detailed_categories,
+                'feature_importances': self.feature_importances,
+                'category_keywords': self.category_keywords,
+                'format_version': MODEL_FORMAT_VERSION,
+                'corrections_stamp': self._trained_corrections_stamp
+            }, path + '.state.joblib', compress=MODEL_COMPRESS_LEVEL)
+            
+            logger.info(f"Model saved to {path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save model: {str(e)}")
+            return False
+    
+    def load_model(self, path, check_corrections=False):
+        """
+        Load a model saved by save_model
+        
+        Saves with a different MODEL_FORMAT_VERSION are not loaded.
+        
+        Args:
+            path (str): Base path the model was saved under, without extension
+            check_corrections (bool): Also refuse a model trained with other user
+                corrections than the ones currently loaded
+            
+        Returns:
+            bool: Success flag
+        """
+        try:
+            state = joblib.load(path + '.state.joblib')
+            
+            if state.get('format_version') != MODEL_FORMAT_VERSION:
+                logger.info(f"Saved model at {path} has an outdated format")
+                return False
+            if check_corrections and state['corrections_stamp'] != self._corrections_stamp:
+                logger.info(f"Saved model at {path} was trained with other user corrections")
+                return False
+            
+            if state['model_type'] == "xgboost":
+                model = xgb.XGBClassifier()
+                model.load_model(path + '.ubj')
+            else:
+                model = joblib.load(path + '.joblib')
+        except FileNotFoundError:
+            logger.info(f"No saved model found at {path}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to load model: {str(e)}")
+            return False
+        
+        self.model = model
+        self.model_type = state['model_type']
+        self.vectorizer = state['vectorizer']
+        self._analyzer = self.vectorizer.build_analyzer()
+        self.use_amount_features = state['use_amount_features']
+        self._feature_names = None
+        self.use_detailed_categories = state['use_detailed_categories']
+        self.categories = DETAILED_CATEGORIES if self.use_detailed_categories else MAIN_CATEGORIES
+        self.feature_importances = state['feature_importances']
+        self.category_keywords = state['category_keywords']
+        self._trained_corrections_stamp = state['corrections_stamp']
+        
+        if state['label_encoder'] is not None:
+            self.label_encoder = state['label_encoder']
+        self._class_index = None  # Rebuilt from the loaded classes on first use
+        
+        # Same path-dependent explainer as after training
+        self.shap_explainer = None
+        if self.model_type == "xgboost":
+            try:
+                self.shap_explainer = shap.TreeExplainer(self.model, feature_perturbation='tree_path_dependent')
+            except Exception as e:
+                logger.warning(f"Could not create SHAP explainer: {str(e)}")
+        
+        logger.info(f"Model loaded from {path}")
+        return True
+    
+    def _fit_xgboost(self, X_train_vec, y_train, device, grid_search=False):
+        """
+        Fit an XGBoost classifier and store it as the model
+        
+        Args:
+            X_train_vec: Vectorized training data
+            y_train: Encoded training labels
+            device (str): 'cuda' or 'cpu'
+            grid_search (bool): Whether to tune hyperparameters with grid search
+        """
+        if grid_search:
+            logger.info("Using grid search for XGBoost hyperparameter tuning")
+            # n_estimators is the budget successive halving grows for the surviving
+            # candidates, so it is not part of the grid
+            param_grid = {
+                'max_depth': [3, 5, 7],
+                'learning_rate': [0.01, 0.1, 0.2],
+                'subsample': [0.8, 1.0],
+                'colsample_bytree': [0.8, 1.0]
+            }
+            
+            # On the CPU the candidate fits run in parallel with one thread each;
+            # parallelizing both levels would oversubscribe the CPU with
+            # n_cores x n_cores threads. A GPU runs one fit at a time
+            if device == 'cuda':
+                search_n_jobs, xgboost_n_jobs = 1, XGBOOST_N_JOBS
+            else:
+                search_n_jobs, xgboost_n_jobs = -1, 1
+            
+            self.model = HalvingGridSearchCV(
+                xgb.XGBClassifier(
+                    objective='multi:softprob',
+                    tree_method='hist',
+                    device=device,
+                    n_jobs=xgboost_n_jobs,
+                    random_state=42
+                ),
+                param_grid,
+                factor=3,
+                resource='n_estimators',
+                min_resources=30,
+                max_resources=300,
+                cv=5,
+                n_jobs=search_n_jobs,
+                verbose=1,
+                scoring='f1_weighted'
+            )
+            
+            self.model.fit(X_train_vec, y_train)
+            logger.info(f"Best parameters: {self.model.best_params_}")
+            self.model = self.model.best_estimator_
+            self.model.set_params(n_jobs=XGBOOST_N_JOBS)
+        else:
+            # Initialize and train model with sensible defaults
+            self.model = xgb.XGBClassifier(
+                n_estimators=200,
+                max_depth=5,
+                learning_rate=0.1,
+                subsample=0.8,
+                colsample_bytree=0.8,
+                objective='multi:softprob',
+                tree_method='hist',
+                device=device,
+                n_jobs=XGBOOST_N_JOBS,
+                random_state=42
+            )
+            
+            self.model.fit(X_train_vec, y_train)
+    
+    def _get_xgboost_device(self, use_gpu=None):
+        """
+        Get the device XGBoost should train on
+        
+        Args:
+            use_gpu (bool, optional): Override the use_gpu setting
+            
+        Returns:
+            str: 'cuda' or 'cpu'
+        """
+        use_gpu = self.use_gpu if use_gpu is None else use_gpu
+        if not use_gpu:
+            return 'cpu'
+        
+        if not xgb.build_info().get('USE_CUDA', False):
+            logger.warning("XGBoost was built without CUDA support; training on the CPU")
+            return 'cpu'
+        
+        return 'cuda'
+    
+    def _vectorize_text(self, processed_text, amount=None):
+        """
+        Compute the model input vector of a single preprocessed text
+        
+        Gives the same result as vectorizer.transform([processed_text]), with the
+        amount features appended when the model uses them, without the input
+        validation and matrix assembly overhead of the general path.
+        
+        Args:
+            processed_text (str): Preprocessed text
+            amount (float, optional): The amount of the expense
+            
+        Returns:
+            scipy.sparse.csr_matrix: 1 x n_features input vector
+        """
+        if self._analyzer is None:
+            self._analyzer = self.vectorizer.build_analyzer()
+        
+        vocabulary = self.vectorizer.vocabulary_
+        counts = Counter(vocabulary[term] for term in self._analyzer(processed_text) if term in vocabulary)
+        
+        indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+        values = np.fromiter((counts[i] for i in indices), dtype=self.vectorizer.dtype, count=len(counts))
+        
+        # Term counts weighted by idf, then L2 normalized
+        values *= self.vectorizer.idf_[indices]
+        norm = np.sqrt(np.dot(values, values))
+        if norm > 0:
+            values /= norm
+        
+        n_features = len(vocabulary)
+        if self.use_amount_features:
+            # Amount indicator columns follow the TF-IDF columns
+            amount_columns = _amount_feature_columns(amount)
+            indices = np.concatenate([indices, np.array(amount_columns, dtype=np.int32) + n_features])
+            values = np.concatenate([values, np.ones(len(amount_columns), dtype=values.dtype)])
+            n_features += len(AMOUNT_FEATURE_NAMES)
+        
+        return sparse.csr_matrix(
+            (values, indices, np.array([0, len(indices)], dtype=np.int32)),
+            shape=(1, n_features)
+        )
+    
+    def _get_feature_names(self):
+        """Get the names of the model's input features, including any amount features"""
+        if self._feature_names is None:
+            feature_names = self.vectorizer.get_feature_names_out()
+            if self.use_amount_features:
+                feature_names = np.concatenate([feature_names, AMOUNT_FEATURE_NAMES])
+            self._feature_names = feature_names
+        return self._feature_names
+    
     def _build_category_keywords(self, X_train_vec, y_train, feature_names):
         """
         Build a dictionary of keywords strongly associated with each category
@@ -1020,28 +1778,22 @@ class ExpenseCategorizer:
         """
         self.category_keywords = {}
         
-        # Convert sparse matrix to array for easier handling
-        X_dense = X_train_vec.toarray()
+        # Sum the term weights of each category's examples with one sparse product,
+        # rather than densifying the whole training matrix
+        categories, codes = np.unique(np.asarray(y_train), return_inverse=True)
+        membership = sparse.csr_matrix(
+            (np.ones(len(codes)), (codes, np.arange(len(codes)))),
+            shape=(len(categories), len(codes))
+        )
+        category_term_sums = (membership @ X_train_vec).toarray()
         
-        # For each category, find the most common terms
-        for category in set(y_train):
-            # Get indices of examples in this category
-            category_indices = [i for i, cat in enumerate(y_train) if cat == category]
-            
-            if not category_indices:
-                continue
-                
-            # Get feature vectors for this category
-            category_vectors = X_dense[category_indices]
-            
-            # Sum up term frequencies for this category
-            term_sums = np.sum(category_vectors, axis=0)
+        n_top = min(20, category_term_sums.shape[1])
+        for category, term_sums in zip(categories, category_term_sums):
+            # Select the top 20 terms, then sort only those by frequency
+            top_indices = np.argpartition(term_sums, -n_top)[-n_top:]
+            top_indices = top_indices[np.argsort(term_sums[top_indices])[::-1]]
             
-            # Sort terms by frequency
-            sorted_indices = term_sums.argsort()[::-1]
-            
-            # Get top 20 terms
-            top_terms = [(feature_names[i], term_sums[i]) for i in sorted_indices[:20] if term_sums[i] > 0]
+            top_terms = [(feature_names[i], term_sums[i]) for i in top_indices if term_sums[i] > 0]
             
             self.category_keywords[category] = top_terms
     
@@ -1052,39 +1804,27 @@ class ExpenseCategorizer:
         Args:
             feature_names: List of feature names from vectorizer
         """
-        # Get overall feature importances
-        importances = self.model.feature_importances_
-        
-        # Sort features by importance
-        indices = np.argsort(importances)[::-1]
-        
-        # Store top features for each category
-        for idx, category in enumerate(self.model.classes_):
-            self.feature_importances[category] = []
-            
-            # If using RandomForestClassifier, get feature importance for each class
-            if hasattr(self.model, 'estimators_'):
-                class_importances = []
+        # If using RandomForestClassifier, rank features by how many trees use them
+        top_features = []
+        if hasattr(self.model, 'estimators_'):
+            trees = [tree for tree in self.model.estimators_ if hasattr(tree, 'tree_')]
+            if trees:
+                # Which features each tree uses, shape (n_trees, n_features)
+                used = np.stack([tree.feature_importances_ for tree in trees]) > 0
+                counts = used.sum(axis=0)
                 
-                for tree in self.model.estimators_:
-                    if hasattr(tree, 'tree_'):
-                        # Extract the class-specific importance from each tree
-                        for i, importance in enumerate(tree.feature_importances_):
-                            if importance > 0:
-                                class_importances.append((feature_names[i], importance))
+                # Most frequent first; ties go to the feature seen first, tree by tree
+                candidates = np.flatnonzero(counts)
+                first_tree = used[:, candidates].argmax(axis=0)
+                top = candidates[np.lexsort((candidates, first_tree, -counts[candidates]))[:20]]
                 
-                # Aggregate and sort
-                if class_importances:
-                    counter = Counter(name for name, _ in class_importances)
-                    
-                    # Get the features that appear most frequently
-                    most_common = counter.most_common(20)
-                    
-                    # Create a list of tuples (feature, importance score)
-                    self.feature_importances[category] = [
-                        (feature, count/len(self.model.estimators_)) 
-                        for feature, count in most_common
-                    ]
+                # Create a list of tuples (feature, importance score)
+                n_estimators = len(self.model.estimators_)
+                top_features = [(feature_names[i], counts[i] / n_estimators) for i in top]
+        
+        # Store top features for each category (the ranking is not class-specific)
+        for category in self.model.classes_:
+            self.feature_importances[category] = list(top_features)
     
     def predict_category(self, description, amount=None):
         """
@@ -1097,152 +1837,240 @@ class ExpenseCategorizer:
         Returns:
             tuple: (predicted_category, confidence, explanation)
         """
-        # --- CORRECTION OVERRIDE LOGIC ---
-        # Check for global/user correction in the database first
-        db_correction = self._get_db_correction(description, amount)
-        if db_correction is not None:
-            return (
-                db_correction.correct_category,
-                1.0,
-                "Correction applied (from database)"
-            )
-        # Check for user correction in memory/file (legacy fallback)
-        if self.corrections_data:
-            # Try to match both description and (if provided) amount
-            for correction in reversed(self.corrections_data):  # use most recent if multiple
-                if correction.get("description", "").strip().lower() == description.strip().lower():
-                    # If amount is provided, match it if present in correction
-                    if amount is not None and "amount" in correction:
-                        try:
-                            if abs(float(correction["amount"]) - float(amount)) < 0.01:
-                                return (
-                                    correction["category"],
-                                    1.0,
-                                    "User correction applied (matched description and amount)"
-                                )
-                        except Exception:
-                            pass  # fallback to description-only match if amount parsing fails
-                    elif amount is None or "amount" not in correction:
-                        # If no amount provided or stored, match on description only
-                        return (
-                            correction["category"],
-                            0.95,
-                            "User correction applied (matched description)"
-                        )
-        # --- END CORRECTION OVERRIDE LOGIC ---
+        return self.predict_batch([description], [amount])[0]
+    
+    def predict_batch(self, descriptions, amounts=None):
+        """
+        Predict the categories of many expenses at once
+        
+        The descriptions are preprocessed together, vectorized into one matrix and
+        scored with a single predict_proba call.
+        
+        Args:
+            descriptions (list): The expense descriptions
+            amounts (list, optional): The amounts of the expenses, None where unknown
+            
+        Returns:
+            list: (predicted_category, confidence, explanation) tuples, in the same order
+        """
+        if amounts is None:
+            amounts = [None] * len(descriptions)
+        
+        results = [
+            self._get_correction_override(description, amount)
+            for description, amount in zip(descriptions, amounts)
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
 
-        if not self.model or not self.vectorizer:
-            # Auto-train the model if it's not already trained
+        if (not self.model or not self.vectorizer) and not self.load_model(self.model_path, check_corrections=True):
+            # Auto-train the model if it's not already trained (training saves it for later processes)
             logger.info("Model not trained. Auto-training now...")
             try:
                 self.train_with_default_data()
             except Exception as e:
                 logger.error(f"Auto-training failed: {e}")
-                return ("Uncategorized", 0.0, "Model not trained")
+                for i in pending:
+                    results[i] = ("Uncategorized", 0.0, "Model not trained")
+                return results
 
         # Preprocess text
-        processed_text = self.preprocess_text(description)
-        
-        if not processed_text:
-            # Default to Miscellaneous if no usable text
-            return "Miscellaneous", 0.0, "Insufficient description for prediction"
+        if len(pending) == 1:
+            processed = [self.preprocess_text(descriptions[pending[0]])]
+        else:
+            processed = self.preprocess_batch([descriptions[i] for i in pending])
         
-        # Convert to vector
-        X = self.vectorizer.transform([processed_text])
+        scored = []
+        for i, processed_text in zip(pending, processed):
+            if processed_text:
+                scored.append((i, processed_text))
+            else:
+                # Default to Miscellaneous if no usable text
+                results[i] = ("Miscellaneous", 0.0, "Insufficient description for prediction")
+        if not scored:
+            return results
+        
+        # Convert to vectors
+        amount_values = np.array([np.nan if amounts[i] is None else float(amounts[i]) for i, _ in scored])
+        if len(scored) == 1:
+            X = self._vectorize_text(scored[0][1], amount_values[0])
+        else:
+            X = self.vectorizer.transform([processed_text for _, processed_text in scored])
+            if self.use_amount_features:
+                X = sparse.hstack([X, _extract_amount_features_batch(amount_values)], format='csr')
         
         # Get probabilities for all categories
-        probabilities = self.model.predict_proba(X)[0]
+        probabilities = self._predict_probabilities(X)
         
-        # Get category with highest probability
-        max_prob_index = np.argmax(probabilities)
+        # Adjust low-confidence predictions using the amounts, for the whole batch at once
+        best_indices = probabilities.argmax(axis=1)
+        category_indices, confidences, amount_rules, price_rules = self._apply_amount_rules(
+            probabilities, best_indices, amount_values
+        )
         
-        # Convert from encoded index to category name
-        if hasattr(self, 'label_encoder'):
-            predicted_category = self.label_encoder.inverse_transform([max_prob_index])[0]
-        else:
-            predicted_category = self.model.classes_[max_prob_index]
+        # Convert from encoded indices to category names
+        classes = self.label_encoder.classes_ if hasattr(self, 'label_encoder') else self.model.classes_
+        
+        for row, (i, processed_text) in enumerate(scored):
+            # Get explanation using SHAP values if available
+            explanation = self._get_prediction_explanation(X[row], processed_text, classes[best_indices[row]])
+            if amount_rules[row] >= 0:
+                explanation += AMOUNT_ADJUSTMENT_RULES[amount_rules[row]][2]
+            if price_rules[row] >= 0:
+                explanation += PRICE_POINT_RULES[price_rules[row]][1]
             
-        confidence = probabilities[max_prob_index]
+            results[i] = self._apply_keyword_rules(
+                processed_text, classes[category_indices[row]], float(confidences[row]), explanation
+            )
         
-        # Get explanation using SHAP values if available
-        explanation = self._get_prediction_explanation(X, processed_text, predicted_category)
+        return results
+    
+    def _get_correction_override(self, description, amount=None):
+        """
+        Find a user correction that overrides the model's prediction
         
-        # If confidence is low, try to use amount and rules to improve prediction
-        if confidence < 0.5 and amount is not None:
-            # Apply some amount-based heuristics
-            if amount > 1000:
-                # Large amounts are often housing, investments, or education
-                housing_idx = self._get_category_index("Housing")
-                investment_idx = self._get_category_index("Investments")
-                education_idx = self._get_category_index("Education")
-                
-                if housing_idx >= 0 and probabilities[housing_idx] > 0.1:
-                    predicted_category = "Housing"
-                    confidence = max(confidence, probabilities[housing_idx] * 1.2)
-                    explanation += f" (amount-based adjustment: large amount suggests Housing category)"
-                elif investment_idx >= 0 and probabilities[investment_idx] > 0.1:
-                    predicted_category = "Investments"
-                    confidence = max(confidence, probabilities[investment_idx] * 1.2)
-                    explanation += f" (amount-based adjustment: large amount suggests Investment category)"
-                elif education_idx >= 0 and probabilities[education_idx] > 0.1:
-                    predicted_category = "Education"
-                    confidence = max(confidence, probabilities[education_idx] * 1.2)
-                    explanation += f" (amount-based adjustment: large amount suggests Education category)"
-            elif amount < 15:
-                # Small amounts often food, transportation, or miscellaneous
-                food_idx = self._get_category_index("Food & Dining")
-                transport_idx = self._get_category_index("Transportation")
-                
-                if food_idx >= 0 and probabilities[food_idx] > 0.1:
-                    predicted_category = "Food & Dining"
-                    confidence = max(confidence, probabilities[food_idx] * 1.2)
-                    explanation += f" (amount-based adjustment: small amount suggests Food & Dining category)"
-                elif transport_idx >= 0 and probabilities[transport_idx] > 0.1:
-                    predicted_category = "Transportation"
-                    confidence = max(confidence, probabilities[transport_idx] * 1.2)
-                    explanation += f" (amount-based adjustment: small amount suggests Transportation category)"
-        
-        # Handle common subscription price points
-        subscription_price_points = [9.99, 10.99, 12.99, 14.99, 15.99, 19.99]
-        entertainment_idx = self._get_category_index("Entertainment")
-        utilities_idx = self._get_category_index("Utilities")
-        
-        if any(abs(amount - price) < 0.01 for price in subscription_price_points):
-            if entertainment_idx >= 0 and probabilities[entertainment_idx] > 0.05:
-                if confidence < 0.6:  # Only override if we're not very confident
-                    predicted_category = "Entertainment"
-                    confidence = max(confidence, 0.6)
-                    explanation += f" (rule-based: subscription price point suggests Entertainment category)"
-            elif utilities_idx >= 0 and probabilities[utilities_idx] > 0.05:
-                if confidence < 0.6:  # Only override if we're not very confident
-                        predicted_category = "Utilities"
-                        confidence = max(confidence, 0.6)
-                        explanation += f" (rule-based: subscription price point suggests Utilities category)"
-        
-        # Look for keywords in low-confidence predictions
-        if confidence < 0.4:
-            health_keywords = {'doctor', 'dentist', 'hospital', 'medical', 'health', 'prescription', 'pharmacy'}
-            food_keywords = {'restaurant', 'grocery', 'cafe', 'coffee', 'food', 'meal', 'takeout', 'lunch', 'dinner'}
-            transport_keywords = {'gas', 'bus', 'train', 'taxi', 'uber', 'lyft', 'fare', 'metro', 'subway'}
+        Args:
+            description (str): The expense description
+            amount (float, optional): The amount of the expense
+            
+        Returns:
+            tuple: (category, confidence, explanation), or None if no correction matches
+        """
+        # Check for global/user correction in the database first
+        db_category = self._get_db_correction(description, amount)
+        if db_category is not None:
+            return (
+                db_category,
+                1.0,
+                "Correction applied (from database)"
+            )
+        # Check for user correction in memory/file (legacy fallback)
+        matches = self._corrections_by_desc.get(self._normalize(description))
+        if matches:
+            # Try to match both description and (if provided) amount
+            for correction in reversed(matches):  # use most recent if multiple
+                # If amount is provided, match it if present in correction
+                if amount is not None and "amount" in correction:
+                    try:
+                        if abs(float(correction["amount"]) - float(amount)) < 0.01:
+                            return (
+                                correction["category"],
+                                1.0,
+                                "User correction applied (matched description and amount)"
+                            )
+                    except Exception:
+                        pass  # fallback to description-only match if amount parsing fails
+                elif amount is None or "amount" not in correction:
+                    # If no amount provided or stored, match on description only
+                    return (
+                        correction["category"],
+                        0.95,
+                        "User correction applied (matched description)"
+                    )
+        return None
+    
+    def _predict_probabilities(self, X):
+        """
+        Predict the probability of each category
+        
+        XGBoost models predict straight from the sparse matrix with the booster's
+        inplace_predict, skipping the DMatrix the sklearn wrapper builds per call,
+        and keep the booster's float32 output.
+        
+        Args:
+            X: Vectorized input
+            
+        Returns:
+            numpy.ndarray: Probabilities, shape (n_samples, n_classes)
+        """
+        if self.model_type != "xgboost":
+            return self.model.predict_proba(X)
+        
+        probabilities = self.model.get_booster().inplace_predict(X)
+        if probabilities.ndim == 1:
+            # Binary models output the probability of the second class only
+            probabilities = np.column_stack([1 - probabilities, probabilities])
+        return probabilities
+    
+    def _apply_amount_rules(self, probabilities, best_indices, amounts):
+        """
+        Adjust low-confidence predictions using the expense amounts
+        
+        Applies AMOUNT_ADJUSTMENT_RULES, then PRICE_POINT_RULES, to every row at once.
+        
+        Args:
+            probabilities (numpy.ndarray): Predicted category probabilities, shape (n_samples, n_classes)
+            best_indices (numpy.ndarray): Index of the most probable class of each row
+            amounts (numpy.ndarray): Expense amounts, NaN where unknown
             
+        Returns:
+            tuple: (category_indices, confidences, amount_rules, price_rules), where the
+                rule arrays hold the index of the rule applied to each row, or -1
+        """
+        rows = np.arange(len(probabilities))
+        category_indices = best_indices.copy()
+        confidences = probabilities[rows, best_indices].astype(np.float64)
+        amount_rules = np.full(len(rows), -1)
+        price_rules = np.full(len(rows), -1)
+        
+        # Large amounts are often housing, investments, or education; small amounts
+        # often food or transportation. Within each group the first matching rule wins
+        low_confidence = confidences < 0.5
+        pending = {
+            True: low_confidence & (amounts > 1000),
+            False: low_confidence & (amounts < 15)
+        }
+        for rule_number, (category, large_amount, _) in enumerate(AMOUNT_ADJUSTMENT_RULES):
+            index = self._get_category_index(category)
+            if index < 0:
+                continue
+            hit = pending[large_amount] & (probabilities[:, index] > 0.1)
+            category_indices[hit] = index
+            confidences[hit] = np.maximum(confidences[hit], probabilities[hit, index] * 1.2)
+            amount_rules[hit] = rule_number
+            pending[large_amount] &= ~hit
+        
+        # Common subscription price points; only the first category the model
+        # gives some probability to is considered
+        pending = np.any(np.abs(amounts[:, np.newaxis] - SUBSCRIPTION_PRICE_ARRAY) < 0.01, axis=1)
+        for rule_number, (category, _) in enumerate(PRICE_POINT_RULES):
+            index = self._get_category_index(category)
+            if index < 0:
+                continue
+            likely = pending & (probabilities[:, index] > 0.05)
+            # Only override if we're not very confident
+            hit = likely & (confidences < 0.6)
+            category_indices[hit] = index
+            confidences[hit] = np.maximum(confidences[hit], 0.6)
+            price_rules[hit] = rule_number
+            pending &= ~likely
+        
+        return category_indices, confidences, amount_rules, price_rules
+    
+    def _apply_keyword_rules(self, processed_text, predicted_category, confidence, explanation):
+        """
+        Adjust a low-confidence prediction using keywords in the description
+        
+        Args:
+            processed_text (str): Preprocessed description
+            predicted_category (str): The predicted category
+            confidence (float): Confidence in the prediction
+            explanation (str): Explanation of the prediction
+            
+        Returns:
+            tuple: (predicted_category, confidence, explanation)
+        """
+        # Look for keywords in low-confidence predictions; the first matching rule wins
+        if confidence < 0.4:
             words = set(processed_text.split())
             
-            health_idx = self._get_category_index("Healthcare")
-            food_idx = self._get_category_index("Food & Dining")
-            transport_idx = self._get_category_index("Transportation")
-            
-            if health_idx >= 0 and any(keyword in words for keyword in health_keywords):
-                predicted_category = "Healthcare"
-                confidence = max(confidence, 0.7)
-                explanation += f" (keyword match: medical terms suggest Healthcare category)"
-            elif food_idx >= 0 and any(keyword in words for keyword in food_keywords):
-                predicted_category = "Food & Dining"
-                confidence = max(confidence, 0.7)
-                explanation += f" (keyword match: food terms suggest Food & Dining category)"
-            elif transport_idx >= 0 and any(keyword in words for keyword in transport_keywords):
-                predicted_category = "Transportation"
-                confidence = max(confidence, 0.7)
-                explanation += f" (keyword match: transport terms suggest Transportation category)"
+            for category, keywords, rule_explanation in KEYWORD_RULES:
+                if not words.isdisjoint(keywords) and self._get_category_index(category) >= 0:
+                    predicted_category = category
+                    confidence = max(confidence, 0.7)
+                    explanation += rule_explanation
+                    break
         
         return predicted_category, confidence, explanation
     
@@ -1266,25 +2094,27 @@ class ExpenseCategorizer:
                 # Get SHAP values
                 shap_values = self.shap_explainer.shap_values(X_vec)
                 
-                # Get category index
-                category_idx = list(self.model.classes_).index(predicted_category)
+                # Get category index (the model's classes are the encoded categories)
+                category_idx = self._get_category_index(predicted_category)
                 
                 # Get feature names
-                feature_names = self.vectorizer.get_feature_names_out()
+                feature_names = self._get_feature_names()
                 
-                # Get the non-zero features in this sample
-                x_dense = X_vec.toarray()[0]
-                feature_indexes = np.where(x_dense > 0)[0]
+                # Get the non-zero features in this sample, straight from the sparse row
+                feature_indexes = X_vec.indices[X_vec.data > 0]
                 
                 # For these features, get their SHAP values for this class
-                feature_shap_values = [(feature_names[i], shap_values[category_idx][0, i]) 
-                                       for i in feature_indexes]
+                values = np.asarray(shap_values[category_idx][0])[feature_indexes]
                 
-                # Sort by absolute SHAP value
-                feature_shap_values.sort(key=lambda x: abs(x[1]), reverse=True)
-                
-                # Get top contributing features
-                top_features = feature_shap_values[:3]
+                # Get top contributing features, by absolute SHAP value
+                abs_values = np.abs(values)
+                top = np.arange(len(values))
+                if len(values) > EXPLANATION_TOP_FEATURES:
+                    # Keep everything tied with the k-th largest, so ties resolve in feature order
+                    kth = np.partition(abs_values, -EXPLANATION_TOP_FEATURES)[-EXPLANATION_TOP_FEATURES]
+                    top = np.flatnonzero(abs_values >= kth)
+                top = top[np.argsort(-abs_values[top], kind='stable')][:EXPLANATION_TOP_FEATURES]
+                top_features = [(feature_names[feature_indexes[i]], values[i]) for i in top]
                 
                 if top_features:
                     explanation += ". Key factors: "
@@ -1353,9 +2183,10 @@ class ExpenseCategorizer:
             
             # Add to corrections data
             self.corrections_data.append(correction)
+            self._index_correction(correction)
             
-            # Save corrections to file
-            self._save_corrections()
+            # Save correction to file
+            self._save_corrections(correction)
             
             logger.info(f"Added user correction: {description} → {correct_category}")
             return True
@@ -1364,16 +2195,39 @@ class ExpenseCategorizer:
             logger.error(f"Error adding user correction: {str(e)}")
             return False
     
-    def _save_corrections(self):
-        """Save user corrections to the stored file"""
+    def _save_corrections(self, correction):
+        """
+        Append a new user correction to the stored file
+        
+        Args:
+            correction (dict): The correction just added to corrections_data
+            
+        Returns:
+            bool: Success flag
+        """
         try:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(self.corrections_path), exist_ok=True)
             
-            with open(self.corrections_path, 'w') as f:
-                json.dump(self.corrections_data, f, indent=2)
+            if os.path.exists(self.corrections_path):
+                new_corrections = [correction]
+            else:
+                # Start the log with every correction, including any loaded from the legacy file
+                new_corrections = self.corrections_data
+            
+            data = b''.join(orjson.dumps(c) + b'\n' for c in new_corrections)
+            with open(self.corrections_path, 'ab+') as f:
+                # Start on a new line if a crash mid-append left the last line unterminated
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        data = b'\n' + data
+                f.write(data)
+            
+            stat = os.stat(self.corrections_path)
+            self._corrections_stamp = (stat.st_mtime_ns, stat.st_size)
                 
-            logger.info(f"Saved {len(self.corrections_data)} user corrections to {self.corrections_path}")
+            logger.info(f"Saved {len(new_corrections)} user corrections to {self.corrections_path}")
             return True
         except Exception as e:
             logger.error(f"Could not save user corrections: {str(e)}")
@@ -1404,17 +2258,15 @@ class ExpenseCategorizer:
     
     def _get_category_index(self, category_name):
         """Get the index of a category in the model classes"""
-        try:
-            if hasattr(self, 'label_encoder'):
-                # Convert category name to encoded value
-                encoded_category = self.label_encoder.transform([category_name])[0]
-                # Return the index of this encoded value
-                return int(encoded_category)
-            else:
-                return list(self.model.classes_).index(category_name)
-        except (ValueError, KeyError) as e:
-            logger.debug(f"Category not found in model classes: {category_name}, error: {str(e)}")
-            return -1
+        if self._class_index is None:
+            classes = self.label_encoder.classes_ if hasattr(self, 'label_encoder') else self.model.classes_
+            self._class_index = {category: i for i, category in enumerate(classes)}
+        
+        index = self._class_index.get(category_name, -1)
+        if index < 0:
+            # Expected for rule categories missing from detailed models, so keep it cheap
+            logger.debug("Category not found in model classes: %s", category_name)
+        return index
     
     def convert_to_main_category(self, subcategory):
         """
@@ -1,14 +1,122 @@
 import numpy as np
 import pandas as pd
+from sklearn.ensemble import IsolationForest
 from datetime import datetime, timedelta
 import logging
-from collections import defaultdict, Counter
+import copy
+import time
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import defaultdict, Counter, OrderedDict
+from operator import attrgetter
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Expense attributes copied into the insights DataFrame, in column order
+EXPENSE_COLUMNS = ('id', 'amount', 'category', 'date', 'description')
+_get_expense_fields = attrgetter(*EXPENSE_COLUMNS)
+
+# Insight types expensive enough to cache between calls; cheaper ones are
+# recomputed, as a lookup would cost about as much as the analysis
+CACHED_INSIGHT_TYPES = frozenset({'unusual_transactions', 'recurring_expenses'})
+
+# Maximum number of cached insight results, and how long (in seconds) one stays
+# valid, since the analyzers compare dates against the current time
+INSIGHTS_CACHE_SIZE = 256
+INSIGHTS_CACHE_TTL = 300
+
+# Cached insight results, least recently used first, shared by all ExpenseInsights
+_insights_cache = OrderedDict()
+_insights_cache_lock = threading.Lock()
+
+def _fingerprint_expenses(df):
+    """
+    Fingerprint the expense data insights are computed from
+    
+    Args:
+        df: DataFrame built by ExpenseInsights._prepare_data
+        
+    Returns:
+        str: Digest of every expense field, in row order
+    """
+    row_hashes = pd.util.hash_pandas_object(df[list(EXPENSE_COLUMNS)], index=False)
+    return hashlib.blake2b(row_hashes.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+def _group_similar_descriptions(descriptions):
+    """
+    Group descriptions that look like the same expense
+    
+    Each description joins the first group, in order of creation, whose key
+    contains it, is contained in it, or shares at least two words with it;
+    otherwise it starts a new group keyed by itself. The matching group is
+    found through indexes of the group keys rather than by comparing against
+    every group, and only once per distinct description, since a repeated
+    description always lands in the same group.
+    
+    Args:
+        descriptions: Lowercased descriptions, in transaction order
+        
+    Returns:
+        list: Group key of each description, None for missing or empty ones
+    """
+    keys = []  # Group keys, in order of creation
+    key_ids = {}  # Group key -> position in keys
+    key_lengths = set()
+    word_keys = defaultdict(list)  # Word -> positions of the keys containing it
+    joined_keys = ''  # Keys separated by NUL, to find the keys containing a description
+    key_offsets = []  # Start of each key in joined_keys
+    group_of = {}
+    
+    result = []
+    for desc in descriptions:
+        if not isinstance(desc, str) or not desc:
+            result.append(None)
+            continue
+        
+        key = group_of.get(desc)
+        if key is None:
+            first_match = len(keys)
+            
+            # Keys containing the description (including an identical key)
+            offset = joined_keys.find(desc)
+            if offset >= 0:
+                first_match = bisect_right(key_offsets, offset) - 1
+            
+            # Keys contained in the description
+            for length in key_lengths:
+                for start in range(len(desc) - length + 1):
+                    key_id = key_ids.get(desc[start:start + length])
+                    if key_id is not None and key_id < first_match:
+                        first_match = key_id
+            
+            # Keys sharing at least two words with the description
+            words = set(desc.split())
+            shared_words = Counter(key_id for word in words for key_id in word_keys.get(word, ()))
+            for key_id, count in shared_words.items():
+                if count >= 2 and key_id < first_match:
+                    first_match = key_id
+            
+            if first_match < len(keys):
+                key = keys[first_match]
+            else:
+                key = desc
+                key_ids[key] = len(keys)
+                key_lengths.add(len(key))
+                for word in words:
+                    word_keys[word].append(len(keys))
+                key_offsets.append(len(joined_keys) + (1 if keys else 0))
+                joined_keys = f"{joined_keys}\0{key}" if keys else key
+                keys.append(key)
+            group_of[desc] = key
+        
+        result.append(key)
+    
+    return result
+
 class ExpenseInsights:
     """
     Analyzes expense data to generate personalized financial insights and recommendations
@@ -24,6 +132,9 @@ class ExpenseInsights:
             'saving_opportunities': self._find_saving_opportunities,
             'recurring_expenses': self._find_recurring_expenses
         }
+        
+        # (DataFrame, totals) from the last _get_amount_totals call
+        self._amount_totals = None
     
     def generate_insights(self, expenses, user_data=None, types=None):
         """
@@ -42,7 +153,9 @@ class ExpenseInsights:
             
         # Convert expenses to DataFrame for easier analysis
         try:
-            df = self._prepare_data(expenses)
+            # One reference time for every analysis, so they agree on what is recent
+            now = datetime.now()
+            df = self._prepare_data(expenses, now)
             
             # Generate requested insights
             insights = {}
@@ -52,9 +165,20 @@ class ExpenseInsights:
             if types and isinstance(types, list):
                 insight_functions = {t: self.insight_types[t] for t in types if t in self.insight_types}
                 
+            # Key for cached results of these expenses, computed only if one may be used
+            cache_key = None
+            if not CACHED_INSIGHT_TYPES.isdisjoint(insight_functions):
+                cache_key = (_fingerprint_expenses(df), repr(user_data), int(time.monotonic() // INSIGHTS_CACHE_TTL))
+                
             # Generate each type of insight
             for insight_type, insight_function in insight_functions.items():
-                insights[insight_type] = insight_function(df, user_data)
+                if insight_type in CACHED_INSIGHT_TYPES:
+                    insights[insight_type] = self._get_cached_insight(insight_type, cache_key, df, user_data, now)
+                else:
+                    insights[insight_type] = insight_function(df, user_data, now)
+            
+            # Release the expense data
+            self._amount_totals = None
                 
             return insights
             
@@ -62,52 +186,111 @@ class ExpenseInsights:
             logger.error(f"Error generating insights: {str(e)}")
             return {'error': str(e)}
     
-    def _prepare_data(self, expenses):
+    def _get_amount_totals(self, df):
+        """
+        Get the total and count of expense amounts per year, month, category and day of week
+        
+        The analyzers roll these up to the totals they need, so the expenses are
+        grouped once rather than once per total.
+        
+        Args:
+            df: DataFrame with expense data
+            
+        Returns:
+            DataFrame with 'sum' and 'count' columns, indexed by year, month, category and day_of_week
+        """
+        if self._amount_totals is None or self._amount_totals[0] is not df:
+            dates = df['date'].dt
+            totals = df.groupby(
+                [dates.year.rename('year'), dates.month.rename('month'), 'category', dates.dayofweek.rename('day_of_week')],
+                observed=True, dropna=False
+            )['amount'].agg(['sum', 'count'])
+            self._amount_totals = (df, totals)
+        return self._amount_totals[1]
+    
+    def _get_cached_insight(self, insight_type, cache_key, df, user_data, now):
+        """
+        Generate one type of insight, reusing the result of an identical earlier call
+        
+        Args:
+            insight_type: Key of the insight in insight_types
+            cache_key: Fingerprint of the expenses, user data and TTL window
+            df: DataFrame with expense data
+            user_data: User information for context
+            now: Current time
+            
+        Returns:
+            List of insights, owned by the caller
+        """
+        key = (insight_type,) + cache_key
+        with _insights_cache_lock:
+            result = _insights_cache.get(key)
+            if result is not None:
+                _insights_cache.move_to_end(key)
+        
+        if result is None:
+            result = self.insight_types[insight_type](df, user_data, now)
+            
+            # Don't keep errors, so the next call tries again
+            if any(insight.get('type') == 'error' for insight in result):
+                return result
+            
+            with _insights_cache_lock:
+                _insights_cache[key] = result
+                if len(_insights_cache) > INSIGHTS_CACHE_SIZE:
+                    _insights_cache.popitem(last=False)
+        
+        # The cached lists must not be modified by callers
+        return copy.deepcopy(result)
+    
+    def _prepare_data(self, expenses, now):
         """
         Convert expense objects to DataFrame
         
         Args:
             expenses: List of expense objects
+            now: Current time, the date of expenses without one
             
         Returns:
             Pandas DataFrame with expense data
         """
-        processed_expenses = []
+        try:
+            # Fetch all the fields of each expense at once
+            rows = list(map(_get_expense_fields, expenses))
+        except AttributeError:
+            # Some expenses lack a field; fill in defaults
+            rows = [
+                (
+                    getattr(expense, 'id', None),
+                    getattr(expense, 'amount', 0),
+                    getattr(expense, 'category', 'Uncategorized'),
+                    getattr(expense, 'date', now),
+                    getattr(expense, 'description', ''),
+                )
+                for expense in expenses
+            ]
         
-        for expense in expenses:
-            # Process each expense into a dict
-            processed_expense = {
-                'id': getattr(expense, 'id', None),
-                'amount': float(getattr(expense, 'amount', 0)),
-                'category': getattr(expense, 'category', 'Uncategorized'),
-                'date': getattr(expense, 'date', datetime.now()),
-                'description': getattr(expense, 'description', ''),
-            }
-            processed_expenses.append(processed_expense)
-            
-        # Create DataFrame
-        df = pd.DataFrame(processed_expenses)
+        # Create DataFrame column by column
+        df = pd.DataFrame(dict(zip(EXPENSE_COLUMNS, zip(*rows))))
+        df['amount'] = df['amount'].astype(float)
         
-        # Ensure date is datetime type
+        # Store categories as integer codes, so grouping by category doesn't hash strings
+        df['category'] = df['category'].astype('category')
+        
+        # Ensure date is datetime type; the analyses derive the date parts they need
         if 'date' in df.columns:
             df['date'] = pd.to_datetime(df['date'])
             
-            # Add derived time fields
-            df['year'] = df['date'].dt.year
-            df['month'] = df['date'].dt.month
-            df['day'] = df['date'].dt.day
-            df['day_of_week'] = df['date'].dt.dayofweek
-            df['week'] = df['date'].dt.isocalendar().week
-            
         return df
         
-    def _analyze_spending_patterns(self, df, user_data):
+    def _analyze_spending_patterns(self, df, user_data, now):
         """
         Analyze spending patterns over time
         
         Args:
             df: DataFrame with expense data
             user_data: User information for context
+            now: Current time
             
         Returns:
             List of insights about spending patterns
@@ -119,10 +302,12 @@ class ExpenseInsights:
             if len(df) < 5:
                 return [{"text": "Add more transactions to get spending pattern insights", "type": "info"}]
                 
+            totals = self._get_amount_totals(df)
+            
             # Monthly spending trends
-            monthly_spending = df.groupby(['year', 'month'])['amount'].sum().reset_index()
+            monthly_spending = totals.groupby(level=['year', 'month'])['sum'].sum().rename('amount').reset_index()
             if len(monthly_spending) >= 2:
-                monthly_spending['month_year'] = monthly_spending.apply(lambda x: f"{x['year']}-{x['month']:02d}", axis=1)
+                monthly_spending['month_year'] = monthly_spending['year'].astype(str) + '-' + monthly_spending['month'].astype(str).str.zfill(2)
                 monthly_spending = monthly_spending.sort_values(['year', 'month'])
                 
                 # Calculate month-over-month change
@@ -155,23 +340,23 @@ class ExpenseInsights:
                         })
             
             # Day of week spending
-            dow_spending = df.groupby('day_of_week')['amount'].agg(['sum', 'count']).reset_index()
+            dow_spending = totals.groupby(level='day_of_week')[['sum', 'count']].sum().reset_index()
             if not dow_spending.empty and dow_spending['count'].sum() >= 10:
                 max_dow = dow_spending.loc[dow_spending['sum'].idxmax()]
                 days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
                 
                 insights.append({
-                    "text": f"You spend the most on {days[max_dow['day_of_week']]}s",
+                    "text": f"You spend the most on {days[int(max_dow['day_of_week'])]}s",
                     "type": "info",
                     "data": {
-                        "day_of_week": days[max_dow['day_of_week']],
+                        "day_of_week": days[int(max_dow['day_of_week'])],
                         "amount": float(max_dow['sum']),
                         "transaction_count": int(max_dow['count'])
                     }
                 })
                 
             # Recent spending spike
-            recent_cutoff = datetime.now() - timedelta(days=14)
+            recent_cutoff = now - timedelta(days=14)
             recent_df = df[df['date'] >= recent_cutoff]
             
             if len(recent_df) >= 5:
@@ -200,13 +385,14 @@ class ExpenseInsights:
             
         return insights
         
-    def _analyze_categories(self, df, user_data):
+    def _analyze_categories(self, df, user_data, now):
         """
         Analyze spending by category
         
         Args:
             df: DataFrame with expense data
             user_data: User information for context
+            now: Current time
             
         Returns:
             List of insights about category spending
@@ -218,8 +404,10 @@ class ExpenseInsights:
             if len(df) < 5:
                 return [{"text": "Add more transactions to get category insights", "type": "info"}]
                 
+            totals = self._get_amount_totals(df)
+            
             # Top spending categories
-            category_spending = df.groupby('category')['amount'].sum().reset_index()
+            category_spending = totals.groupby(level='category', observed=True)['sum'].sum().rename('amount').reset_index()
             if not category_spending.empty:
                 category_spending = category_spending.sort_values('amount', ascending=False)
                 top_category = category_spending.iloc[0]
@@ -251,44 +439,38 @@ class ExpenseInsights:
                     })
                     
             # Monthly category trends
-            if 'month' in df.columns and 'year' in df.columns:
+            if 'date' in df.columns:
                 # Get the most recent 3 months of data
-                df['year_month'] = df['year'].astype(str) + '-' + df['month'].astype(str).str.zfill(2)
-                recent_months = sorted(df['year_month'].unique())[-3:]
-                recent_data = df[df['year_month'].isin(recent_months)]
+                monthly_counts = totals.groupby(level=['year', 'month'])['count'].sum()
+                recent_months = monthly_counts.index[-3:]
                 
-                if len(recent_data) >= 10:
+                if monthly_counts.iloc[-3:].sum() >= 10:
                     # Find categories with significant increase
-                    pivot = pd.pivot_table(
-                        recent_data, 
-                        values='amount', 
-                        index='category', 
-                        columns='year_month', 
-                        aggfunc='sum'
-                    ).fillna(0)
+                    recent_totals = totals[totals.index.droplevel(['category', 'day_of_week']).isin(recent_months)]
+                    month_category_totals = recent_totals.groupby(level=['year', 'month', 'category'], observed=True)['sum'].sum()
+                    category_months = month_category_totals.index.droplevel('category').unique()
                     
-                    if pivot.shape[1] >= 2:
-                        # Compare latest month to previous
-                        latest_month = pivot.columns[-1]
-                        prev_month = pivot.columns[-2]
+                    if len(category_months) >= 2:
+                        # Compare latest month to previous, for the categories with spending in the latest month
+                        latest = month_category_totals.loc[category_months[-1]]
+                        previous = month_category_totals.loc[category_months[-2]].reindex(latest.index, fill_value=0)
                         
-                        # Calculate percent change for each category
-                        pivot['change'] = ((pivot[latest_month] - pivot[prev_month]) / pivot[prev_month]) * 100
-                        pivot = pivot.replace([np.inf, -np.inf], np.nan).dropna(subset=['change'])
+                        # Calculate percent change for each category, skipping those with nothing to compare to
+                        change = ((latest - previous) / previous.where(previous != 0)) * 100
                         
                         # Find categories with significant increase
-                        increasing_cats = pivot[(pivot['change'] > 30) & (pivot[latest_month] > 100)]
+                        increasing_cats = change[(change > 30) & (latest > 100)]
                         
                         if not increasing_cats.empty:
-                            top_increase = increasing_cats.sort_values('change', ascending=False).iloc[0]
+                            category = increasing_cats.idxmax()
                             insights.append({
-                                "text": f"Your spending on {top_increase.name} increased by {top_increase['change']:.1f}% compared to last month",
+                                "text": f"Your spending on {category} increased by {increasing_cats[category]:.1f}% compared to last month",
                                 "type": "alert",
                                 "data": {
-                                    "category": top_increase.name,
-                                    "current": float(top_increase[latest_month]),
-                                    "previous": float(top_increase[prev_month]),
-                                    "change_percent": float(top_increase['change'])
+                                    "category": category,
+                                    "current": float(latest[category]),
+                                    "previous": float(previous[category]),
+                                    "change_percent": float(increasing_cats[category])
                                 }
                             })
                 
@@ -298,13 +480,14 @@ class ExpenseInsights:
             
         return insights
         
-    def _find_unusual_transactions(self, df, user_data):
+    def _find_unusual_transactions(self, df, user_data, now):
         """
         Identify unusual or outlier transactions
         
         Args:
             df: DataFrame with expense data
             user_data: User information for context
+            now: Current time
             
         Returns:
             List of insights about unusual transactions
@@ -316,33 +499,25 @@ class ExpenseInsights:
             if len(df) < 10:
                 return [{"text": "Add more transactions to identify unusual spending", "type": "info"}]
                 
-            # Find category outliers using Z-score
-            category_groups = df.groupby('category')
+            # Score every transaction with an Isolation Forest over amount, day of week
+            # and category, so small categories and multimodal spending are covered too
+            category_codes, _ = pd.factorize(df['category'])
+            X = np.column_stack([df['amount'].to_numpy(), df['date'].dt.dayofweek.to_numpy(), category_codes])
+            iso = IsolationForest(contamination=0.05, n_estimators=100, n_jobs=-1, random_state=42).fit(X)
+            anomaly_scores = iso.score_samples(X)
             
-            outliers = []
-            for category, group in category_groups:
-                if len(group) >= 5:  # Need at least 5 transactions to determine outliers
-                    mean = group['amount'].mean()
-                    std = group['amount'].std()
-                    
-                    if std > 0:  # Avoid division by zero
-                        # Calculate Z-scores
-                        z_scores = (group['amount'] - mean) / std
-                        
-                        # Find outliers (Z-score > 2.5)
-                        category_outliers = group[z_scores > 2.5]
-                        
-                        # Only include recent outliers (last 60 days)
-                        recent_cutoff = datetime.now() - timedelta(days=60)
-                        recent_outliers = category_outliers[category_outliers['date'] >= recent_cutoff]
-                        
-                        outliers.extend(recent_outliers.to_dict('records'))
+            # Anomalies are the scores below the contamination threshold (as iso.predict
+            # decides), only including recent ones (last 60 days)
+            recent_cutoff = now - timedelta(days=60)
+            is_outlier = (anomaly_scores < iso.offset_) & (df['date'] >= recent_cutoff).to_numpy()
             
-            # Sort outliers by amount (descending)
-            outliers.sort(key=lambda x: x['amount'], reverse=True)
+            # Most anomalous first, limited to the top 3 outliers
+            positions = np.flatnonzero(is_outlier)
+            positions = positions[np.argsort(anomaly_scores[positions], kind='stable')][:3]
+            outliers = df.iloc[positions].to_dict('records')
             
             # Generate insights for top outliers
-            for i, outlier in enumerate(outliers[:3]):  # Limit to top 3 outliers
+            for i, outlier in enumerate(outliers):
                 date_str = outlier['date'].strftime('%b %d') if hasattr(outlier['date'], 'strftime') else str(outlier['date'])
                 category = outlier['category']
                 amount = outlier['amount']
@@ -359,7 +534,7 @@ class ExpenseInsights:
                 })
                 
             # Highest single transaction in last 30 days
-            recent_cutoff = datetime.now() - timedelta(days=30)
+            recent_cutoff = now - timedelta(days=30)
             recent_df = df[df['date'] >= recent_cutoff]
             
             if not recent_df.empty:
@@ -385,13 +560,14 @@ class ExpenseInsights:
             
         return insights
         
-    def _find_saving_opportunities(self, df, user_data):
+    def _find_saving_opportunities(self, df, user_data, now):
         """
         Identify potential saving opportunities
         
         Args:
             df: DataFrame with expense data
             user_data: User information for context
+            now: Current time
             
         Returns:
             List of insights about saving opportunities
@@ -410,7 +586,7 @@ class ExpenseInsights:
             ]
             
             # Recent data (last 90 days)
-            recent_cutoff = datetime.now() - timedelta(days=90)
+            recent_cutoff = now - timedelta(days=90)
             recent_df = df[df['date'] >= recent_cutoff]
             
             if len(recent_df) < 10:
@@ -481,13 +657,14 @@ class ExpenseInsights:
             
         return insights
         
-    def _find_recurring_expenses(self, df, user_data):
+    def _find_recurring_expenses(self, df, user_data, now):
         """
         Identify potential recurring expenses and subscriptions
         
         Args:
             df: DataFrame with expense data
             user_data: User information for context
+            now: Current time
             
         Returns:
             List of insights about recurring expenses
@@ -499,77 +676,49 @@ class ExpenseInsights:
             if len(df) < 10:
                 return [{"text": "Add more transactions to detect recurring expenses", "type": "info"}]
                 
-            # Keywords that suggest subscriptions
-            subscription_keywords = [
-                'subscription', 'monthly', 'netflix', 'spotify', 'amazon prime',
-                'hulu', 'disney+', 'apple music', 'google play', 'youtube',
-                'prime', 'membership', 'gym', 'fitness', 'club', 'streaming'
-            ]
-            
             # Find description patterns that appear in multiple months
             # Group by month-year and description
             if 'description' not in df.columns:
                 return [{"text": "Transaction descriptions are needed to detect recurring expenses", "type": "info"}]
                 
             # Convert descriptions to lowercase
-            df['description_lower'] = df['description'].str.lower() if 'description' in df.columns else ''
-            
-            # Check for subscription keywords in description
-            is_subscription = df['description_lower'].apply(
-                lambda x: any(keyword in x for keyword in subscription_keywords) if isinstance(x, str) else False
-            )
-            potential_subscriptions = df[is_subscription]
+            description_lower = df['description'].str.lower()
             
             # Group by similar descriptions
-            description_groups = defaultdict(list)
-            
-            for _, row in df.iterrows():
-                desc = row.get('description_lower', '')
-                if not isinstance(desc, str) or not desc:
-                    continue
-                    
-                # Check for similar descriptions
-                added = False
-                for key in description_groups:
-                    # Simple similarity check - could be improved with NLP
-                    if (key in desc) or (desc in key) or (len(set(desc.split()) & set(key.split())) >= 2):
-                        description_groups[key].append(row)
-                        added = True
-                        break
-                        
-                if not added:
-                    description_groups[desc].append(row)
-            
-            # Find patterns that occur in multiple months with similar amounts
-            recurring_expenses = []
+            description_groups = pd.Series(_group_similar_descriptions(description_lower), index=df.index)
+            
+            # Summarize every group at once
+            groups = df.groupby(description_groups, sort=False)
+            group_stats = groups.agg(
+                transactions=('amount', 'size'),
+                amount_mean=('amount', 'mean'),
+                amount_std=('amount', 'std'),
+                first_date=('date', 'min'),
+                latest_date=('date', 'max')
+            )
+            dates = df['date'].dt
+            group_stats['unique_months'] = (dates.year * 12 + dates.month).groupby(description_groups, sort=False).nunique()
+            
+            # Find patterns that occur in multiple months (at least 2 to be recurring)
+            # with similar amounts (low variance in amount)
+            recurring_groups = group_stats[
+                (group_stats['transactions'] >= 2)
+                & (group_stats['unique_months'] >= 2)
+                & (group_stats['amount_mean'] > 0)
+                & (group_stats['amount_std'] / group_stats['amount_mean'] < 0.2)
+            ]
             
-            for desc, transactions in description_groups.items():
-                if len(transactions) < 2:
-                    continue
-                    
-                # Convert transactions to DataFrame
-                group_df = pd.DataFrame(transactions)
-                
-                # Need at least 2 months to be recurring
-                if 'date' in group_df.columns:
-                    group_df['year_month'] = group_df['date'].dt.strftime('%Y-%m')
-                    unique_months = group_df['year_month'].nunique()
-                    
-                    if unique_months >= 2:
-                        # Check if amounts are similar
-                        amount_std = group_df['amount'].std()
-                        amount_mean = group_df['amount'].mean()
-                        
-                        if amount_mean > 0 and (amount_std / amount_mean) < 0.2:  # Low variance in amount
-                            # This is likely a recurring expense
-                            latest_date = group_df['date'].max()
-                            recurring_expenses.append({
-                                'description': desc,
-                                'amount': amount_mean,
-                                'frequency': unique_months / (group_df['date'].max() - group_df['date'].min()).days * 30,
-                                'transactions': len(group_df),
-                                'latest_date': latest_date
-                            })
+            # These are likely recurring expenses
+            recurring_expenses = [
+                {
+                    'description': desc,
+                    'amount': float(group.amount_mean),
+                    'frequency': group.unique_months / (group.latest_date - group.first_date).days * 30,
+                    'transactions': int(group.transactions),
+                    'latest_date': group.latest_date
+                }
+                for desc, group in zip(recurring_groups.index, recurring_groups.itertuples(index=False))
+            ]
             
             # Sort by amount (descending)
             recurring_expenses.sort(key=lambda x: x['amount'], reverse=True)
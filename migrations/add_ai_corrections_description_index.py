@@ -0,0 +1,65 @@
+"""
+Add description index to ai_corrections table
+
+This migration adds an index on lower(description) to the ai_corrections table,
+used by the categorizer when looking up corrections for a transaction description.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path to import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from db import db
+from sqlalchemy import text
+import traceback
+
+def upgrade():
+    """Add ix_ai_corrections_description_lower index to ai_corrections table"""
+    try:
+        with app.app_context():
+            # Check if the index already exists
+            inspector = db.inspect(db.engine)
+            indexes = [index['name'] for index in inspector.get_indexes('ai_corrections')]
+
+            if 'ix_ai_corrections_description_lower' not in indexes:
+                # Add the index
+                db.session.execute(text('CREATE INDEX ix_ai_corrections_description_lower ON ai_corrections (lower(description))'))
+                db.session.commit()
+                print("Added ix_ai_corrections_description_lower index to ai_corrections table")
+            else:
+                print("Index ix_ai_corrections_description_lower already exists")
+
+            return True
+    except Exception as e:
+        print(f"Error adding index: {str(e)}")
+        traceback.print_exc()
+        return False
+
+def downgrade():
+    """Remove ix_ai_corrections_description_lower index from ai_corrections table"""
+    try:
+        with app.app_context():
+            # Check if the index exists
+            inspector = db.inspect(db.engine)
+            indexes = [index['name'] for index in inspector.get_indexes('ai_corrections')]
+
+            if 'ix_ai_corrections_description_lower' in indexes:
+                # Remove the index
+                db.session.execute(text('DROP INDEX ix_ai_corrections_description_lower'))
+                db.session.commit()
+                print("Removed ix_ai_corrections_description_lower index from ai_corrections table")
+            else:
+                print("Index ix_ai_corrections_description_lower does not exist")
+
+            return True
+    except Exception as e:
+        print(f"Error removing index: {str(e)}")
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    # Execute upgrade when the script is run directly
+    upgrade()
@@ -9,7 +9,8 @@ import logging
 import datetime as dt
 import traceback
 from db import db
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, object_session
 from models.user import User
 
 # Configure logging
@@ -38,6 +39,16 @@ class AICorrection(db.Model):
     model_version = db.Column(db.Integer, nullable=True)  # Model version when correction was made
     applied_in_version = db.Column(db.Integer, nullable=True)  # Model version that included this correction
     
+    # Case-insensitive description lookups used by the categorizer's correction override
+    __table_args__ = (
+        db.Index('ix_ai_corrections_description_lower', db.func.lower(description)),
+    )
+    
+    # Bumped whenever a session in this process commits or rolls back writes to
+    # this table (see the event listeners below), so cached correction lookups
+    # are invalidated
+    revision = 0
+    
     # Relationship with user
     user = db.relationship('User', backref=db.backref('ai_corrections', lazy=True))
     
@@ -247,24 +258,20 @@ class AICorrection(db.Model):
                 try:
                     now = dt.datetime.utcnow()
                     
-                    # Get the corrections to update
-                    corrections = AICorrection.query.filter(AICorrection.id.in_(correction_ids)).all()
+                    # Update the corrections with a single UPDATE statement
+                    updated_count = AICorrection.query.filter(AICorrection.id.in_(correction_ids)).update({
+                        AICorrection.is_applied: True,
+                        AICorrection.applied_at: now,
+                        AICorrection.applied_in_version: model_version
+                    }, synchronize_session=False)
                     
-                    if not corrections:
+                    if not updated_count:
                         logger.warning(f"No corrections found with IDs: {correction_ids}")
                         db.session.rollback()
                         return 0
                     
-                    # Update each correction
-                    for correction in corrections:
-                        correction.is_applied = True
-                        correction.applied_at = now
-                        correction.applied_in_version = model_version
-                        db.session.add(correction)
-                    
                     # Commit the transaction
                     db.session.commit()
-                    updated_count = len(corrections)
                     logger.info(f"Successfully marked {updated_count} corrections as applied (attempt {attempt+1})")
                     return updated_count
                     
@@ -378,4 +385,36 @@ class AICorrection(db.Model):
         except Exception as e:
             logger.error(f"Error getting recent corrections: {str(e)}")
             logger.error(traceback.format_exc())
-            return [] 
\ No newline at end of file
+            return []
+
+
+# Session.info key marking a session that has written ai_corrections rows
+CORRECTIONS_CHANGED_KEY = 'ai_corrections_changed'
+
+
+@event.listens_for(AICorrection, 'after_insert')
+@event.listens_for(AICorrection, 'after_update')
+@event.listens_for(AICorrection, 'after_delete')
+def _flag_correction_write(mapper, connection, target):
+    """Mark the session flushing a correction row as having written corrections"""
+    session = object_session(target)
+    if session is not None:
+        session.info[CORRECTIONS_CHANGED_KEY] = True
+    else:
+        AICorrection.revision += 1
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _flag_bulk_correction_write(orm_execute_state):
+    """Mark sessions running bulk UPDATE/DELETE statements (e.g. Query.delete()) on corrections"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is AICorrection.__mapper__:
+        orm_execute_state.session.info[CORRECTIONS_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _bump_correction_revision(session):
+    """Invalidate cached correction lookups once a session's correction writes end"""
+    if session.info.pop(CORRECTIONS_CHANGED_KEY, False):
+        AICorrection.revision += 1